@@ -0,0 +1,76 @@
+# backend/benchmarks/compare.py
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json
+
+Exits with status 1 when any tracked metric regresses by more than --threshold.
+"""
+import argparse
+import json
+import sys
+
+# Metric name suffix -> True if higher is better
+TRACKED = {
+    "p50_ms": False,
+    "p99_ms": False,
+    "mean_ms": False,
+    "peak_rss_mb": False,
+    "pages_per_sec": True,
+    "queries_per_sec": True,
+}
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline, candidate, threshold):
+    old, new = flatten(baseline["results"]), flatten(candidate["results"])
+    rows, regressions = [], []
+    for path in sorted(old.keys() & new.keys()):
+        metric = path.rsplit(".", 1)[-1]
+        if metric not in TRACKED or not old[path]:
+            continue
+        change = (new[path] - old[path]) / old[path]
+        worse = -change if TRACKED[metric] else change
+        rows.append((path, old[path], new[path], change))
+        if worse > threshold:
+            regressions.append(path)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression (default 10%%).")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    print(f"{'metric':<55} {baseline['commit']:>12} {candidate['commit']:>12} {'change':>9}")
+    for path, old, new, change in rows:
+        flag = "  <-- regression" if path in regressions else ""
+        print(f"{path:<55} {old:>12.3f} {new:>12.3f} {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
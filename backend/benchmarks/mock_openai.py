@@ -0,0 +1,248 @@
+# backend/benchmarks/mock_openai.py
+"""
+Local, deterministic stand-in for the OpenAI endpoints used by the backend.
+
+Serves /v1/embeddings and /v1/chat/completions (text and vision) with seeded
+vectors and canned answers, so benchmarks run offline and produce the same
+output on every run. Latency is injected per endpoint.
+
+Run standalone:
+    python -m benchmarks.mock_openai --port 8765 --chat-latency-ms 400
+then point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+EMBEDDING_DIM = 3072  # text-embedding-3-large, matches the shipped FAISS indices
+
+
+@dataclass
+class LatencyModel:
+    """
+    Lognormal latency around `median_ms` with spread `sigma`, plus an optional
+    slow tail: with probability `tail_prob` the call takes `tail_ms` instead.
+    """
+    median_ms: float = 0.0
+    sigma: float = 0.0
+    tail_prob: float = 0.0
+    tail_ms: float = 0.0
+    seed: int = 0
+    _rng: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def sample(self):
+        with self._lock:
+            if self.tail_prob and self._rng.random() < self.tail_prob:
+                return self.tail_ms / 1000.0
+            if self.median_ms <= 0:
+                return 0.0
+            return self.median_ms * float(np.exp(self.sigma * self._rng.gauss(0.0, 1.0))) / 1000.0
+
+
+def seeded_embedding(text, dim=EMBEDDING_DIM):
+    """Unit-norm vector derived from the text hash; identical text -> identical vector."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vec = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def _count_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _message_text(messages):
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(p.get("text", "") for p in content if p.get("type") == "text")
+    return "\n".join(parts)
+
+
+def _is_vision(messages):
+    return any(
+        isinstance(m.get("content"), list) and any(p.get("type") == "image_url" for p in m["content"])
+        for m in messages
+    )
+
+
+class MockOpenAI:
+    """Request handlers and counters shared by the HTTP server threads."""
+
+    def __init__(self, embed_latency=None, chat_latency=None, vision_latency=None):
+        self.embed_latency = embed_latency or LatencyModel()
+        self.chat_latency = chat_latency or LatencyModel()
+        self.vision_latency = vision_latency or LatencyModel()
+        self.calls = {"embeddings": 0, "chat": 0, "vision": 0}
+        self.failures = {"embeddings": 0, "chat": 0}  # upcoming calls to answer with HTTP 500
+        self.embed_dim = EMBEDDING_DIM  # used when the request does not ask for `dimensions`
+        self._lock = threading.Lock()
+
+    def _count(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+
+    def should_fail(self, kind):
+        with self._lock:
+            if self.failures.get(kind):
+                self.failures[kind] -= 1
+                return True
+            return False
+
+    def embeddings(self, body):
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dim = body.get("dimensions") or self.embed_dim
+        self._count("embeddings")
+        time.sleep(self.embed_latency.sample())
+
+        data = []
+        for i, text in enumerate(inputs):
+            vec = seeded_embedding(text, dim)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vec.tobytes()).decode("ascii")
+            else:
+                embedding = vec.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+        tokens = sum(_count_tokens(t) for t in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "mock-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def chat(self, body):
+        messages = body.get("messages", [])
+        vision = _is_vision(messages)
+        self._count("vision" if vision else "chat")
+        time.sleep((self.vision_latency if vision else self.chat_latency).sample())
+
+        prompt = _message_text(messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        n_words = min(int(body.get("max_tokens") or 300), 120)
+        words = [f"{'Page' if vision else 'Answer'} {digest}:"] + ["lorem"] * (n_words - 1)
+        content = " ".join(words)
+
+        prompt_tokens = _count_tokens(prompt) + (765 if vision else 0)
+        return {
+            "id": f"chatcmpl-mock-{digest}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", "mock-chat"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": n_words,
+                "total_tokens": prompt_tokens + n_words,
+            },
+        }
+
+
+def _make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            kind = "embeddings" if self.path.endswith("/embeddings") else "chat"
+            status = 200
+            if mock.should_fail(kind):
+                status, payload = 500, {"error": {"message": "Injected failure", "type": "server_error"}}
+            elif self.path.endswith("/embeddings"):
+                payload = mock.embeddings(body)
+            elif self.path.endswith("/chat/completions"):
+                payload = mock.chat(body)
+            else:
+                self.send_error(404, "Unknown endpoint")
+                return
+
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            try:
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up (timeout or hedged call that lost)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_mock_server(mock=None, host="127.0.0.1", port=0):
+    """
+    Start the mock server on a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    mock = mock or MockOpenAI()
+    server = ThreadingHTTPServer((host, port), _make_handler(mock))
+    server.daemon_threads = True
+    server.mock = mock
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def add_latency_args(parser):
+    for name in ("embed", "chat", "vision"):
+        parser.add_argument(f"--{name}-latency-ms", type=float, default=0.0,
+                            help=f"Median latency of mock {name} calls.")
+    parser.add_argument("--latency-sigma", type=float, default=0.0,
+                        help="Lognormal spread applied to all mock latencies.")
+    parser.add_argument("--chat-tail-prob", type=float, default=0.0,
+                        help="Probability that a chat call is a slow outlier.")
+    parser.add_argument("--chat-tail-ms", type=float, default=0.0,
+                        help="Latency of slow chat outliers.")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def mock_from_args(args):
+    return MockOpenAI(
+        embed_latency=LatencyModel(args.embed_latency_ms, args.latency_sigma, seed=args.seed),
+        chat_latency=LatencyModel(args.chat_latency_ms, args.latency_sigma,
+                                  args.chat_tail_prob, args.chat_tail_ms, seed=args.seed + 1),
+        vision_latency=LatencyModel(args.vision_latency_ms, args.latency_sigma, seed=args.seed + 2),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic local OpenAI stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_latency_args(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(mock_from_args(args)))
+    print(f"Mock OpenAI listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,359 @@
+# backend/benchmarks/run.py
+"""
+Offline benchmark suite for the RAG backend.
+
+All OpenAI traffic goes to the local stand-in in `benchmarks.mock_openai`, so
+results are reproducible and free. Run from the `backend/` directory:
+
+    python -m benchmarks.run                              # default suite
+    python -m benchmarks.run --sizes 10000,100000,1000000 --dim 768  # larger corpora (~3 GB index at 1M)
+    python -m benchmarks.compare old.json new.json        # regression check
+
+Results are written as JSON (one file per commit by default).
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.mock_openai import (
+    LatencyModel, add_latency_args, mock_from_args, seeded_embedding, start_mock_server
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+QUERIES = [
+    "What is the dividend policy?",
+    "How much capital expenditure is planned for next year?",
+    "Who sits on the audit committee?",
+    "What are the production targets for LNG?",
+    "Summarize executive compensation changes.",
+    "What is the free cash flow outlook?",
+    "Which shareholder proposals are on the ballot?",
+    "How are emissions reduction goals tracked?",
+]
+
+
+def query_set(n):
+    """Distinct query strings so every call exercises the full path."""
+    return [f"{QUERIES[i % len(QUERIES)]} (#{i})" for i in range(n)]
+
+
+def latency_stats(samples):
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    return {
+        "n": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+# ----------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------
+def bench_startup(repeats):
+    """Cold import of src.main (settings, client, RAGService, index loading) in a fresh process."""
+    code = (
+        "import time, json, resource; t = time.perf_counter(); import src.main; "
+        "print(json.dumps({'s': time.perf_counter() - t, "
+        "'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))"
+    )
+    samples, rss = [], []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=os.environ,
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["s"])
+        rss.append(result["rss"] / 1024)
+    return {**latency_stats(samples), "peak_rss_mb": round(max(rss), 1)}
+
+
+def bench_search(service, pdf_ids, n_queries, top_k):
+    results = {}
+    for pdf_id in pdf_ids:
+        samples = [timed(service.rag_search_service, q, pdf_id, top_k) for q in query_set(n_queries)]
+        results[pdf_id] = latency_stats(samples)
+    return results
+
+
+def bench_compare(service, pdf_ids, n_queries, top_k):
+    pdf1_id, pdf2_id = pdf_ids[:2]
+    samples = [timed(service.compare_pdfs_service, q, pdf1_id, pdf2_id, top_k) for q in query_set(n_queries)]
+    return latency_stats(samples)
+
+
+def bench_batch(service, pdf_id, n_queries, top_k):
+    """A checklist run through the batch path: one embedding request, one search, concurrent answers."""
+    queries = [f"Checklist: {q}" for q in query_set(n_queries)]
+    start = time.perf_counter()
+    first = None
+    for _ in service.rag_search_batch_service(queries, pdf_id, top_k):
+        if first is None:
+            first = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return {
+        "queries": n_queries,
+        "elapsed_s": round(elapsed, 3),
+        "first_result_ms": round(first * 1000, 3),
+        "queries_per_sec": round(n_queries / elapsed, 2),
+    }
+
+
+def bench_burst(service, mock, pdf_id, clients, top_k):
+    """A dashboard refresh: many clients send the identical search at once."""
+    calls_before = dict(mock.calls)
+    barrier = threading.Barrier(clients)
+    samples = []
+
+    def client():
+        barrier.wait()
+        samples.append(timed(service.rag_search_service, "Dashboard: what is the dividend policy?", pdf_id, top_k))
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "clients": clients,
+        **latency_stats(samples),
+        "upstream_calls": {k: mock.calls[k] - calls_before[k] for k in mock.calls},
+    }
+
+
+def bench_hedging(service, mock, pdf_id, n_queries, top_k, deadline_ms, tail_prob, tail_ms):
+    """Searches against a chat endpoint with a slow tail, first without then with hedged requests."""
+    from src.utils.hedging import Deadline
+
+    original = mock.chat_latency
+    mock.chat_latency = LatencyModel(100.0, 0.2, tail_prob, tail_ms, seed=7)
+    hedger = service.openai_client.hedger
+    enabled = hedger.enabled
+    results = {}
+    try:
+        # The unhedged pass also warms up the latency tracker that sets the hedge delay
+        for label, hedge in (("unhedged", False), ("hedged", True)):
+            hedger.enabled = hedge
+            samples, degraded = [], 0
+            for q in query_set(n_queries):
+                start = time.perf_counter()
+                result = service.rag_search_service(f"Hedging {label}: {q}", pdf_id, top_k,
+                                                    Deadline(deadline_ms / 1000))
+                samples.append(time.perf_counter() - start)
+                degraded += bool(result.get("degraded"))
+            results[label] = {**latency_stats(samples), "degraded": degraded}
+    finally:
+        hedger.enabled = enabled
+        mock.chat_latency = original
+    return results
+
+
+def build_synthetic_index(size, dim, seed, batch=50_000):
+    import faiss
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    index = faiss.IndexFlatIP(dim)
+    for start in range(0, size, batch):
+        vecs = rng.standard_normal((min(batch, size - start), dim), dtype=np.float32)
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        index.add(vecs)
+    df = pd.DataFrame({
+        "content": [f"[Page {i % 500 + 1}]\nSynthetic chunk {i}" for i in range(size)],
+        "page": [i % 500 + 1 for i in range(size)],
+    })
+    return index, df
+
+
+def bench_synthetic_search(mock, sizes, dim, n_queries, top_k, seed):
+    from src.utils.utils import FAISSManager
+
+    # Query embeddings must match the synthetic index dimension
+    mock.embed_dim = dim
+
+    results = {}
+    for size in sizes:
+        # IndexFlatIP keeps every float32 vector in memory (plus the metadata DataFrame)
+        print(f"Building synthetic index: {size} x {dim} (~{size * dim * 4 / 1024 ** 3:.1f} GB)", file=sys.stderr)
+        build_start = time.perf_counter()
+        index, df = build_synthetic_index(size, dim, seed)
+        build_s = time.perf_counter() - build_start
+
+        indices = {"synthetic": (index, df)}
+        manager = FAISSManager({}, "synthetic")
+        queries = query_set(n_queries)
+
+        end_to_end = [timed(manager.search_faiss, q, indices, top_k) for q in queries]
+        vectors = [seeded_embedding(q, dim).reshape(1, -1) for q in queries]
+        raw = [timed(index.search, v, top_k) for v in vectors]
+
+        results[str(size)] = {
+            "build_s": round(build_s, 3),
+            "search_faiss": latency_stats(end_to_end),
+            "index_search": latency_stats(raw),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        del index, df, indices
+    return results
+
+
+def synthetic_doc(n_pages):
+    text_pages, descriptions = [], []
+    for page in range(1, n_pages + 1):
+        title = f"Section {page} Operating Highlights"
+        text_pages.append(f"{title}\n" + " ".join(f"metric{page}_{w} grew 4%" for w in range(60)))
+        if page % 2 == 0:
+            descriptions.append(f"{title}\nKey Facts: page {page} chart shows rising volumes.")
+    return {"filename": "synthetic.pdf", "text": "\f".join(text_pages), "pages_description": descriptions}
+
+
+def bench_ingest(n_pages):
+    """Chunk, clean, embed and index a synthetic document (rasterization excluded)."""
+    from src.utils.utils import ContentChunker, FAISSManager
+
+    doc = synthetic_doc(n_pages)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"bench": {
+            "index": os.path.join(tmp, "faiss_index_bench.idx"),
+            "metadata": os.path.join(tmp, "faiss_metadata_bench.csv"),
+            "summary": os.path.join(tmp, "summary_bench.json"),
+        }}
+        start = time.perf_counter()
+        chunker = ContentChunker(doc)
+        clean_content = chunker.cleanup(chunker.chunk())
+        FAISSManager(paths, "bench").save_faiss_index(clean_content)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "pages": n_pages,
+        "chunks": len(clean_content),
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_sec": round(n_pages / elapsed, 2),
+    }
+
+
+# ----------------------------------------------------------
+# Entry Point
+# ----------------------------------------------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline RAG backend benchmarks.")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per latency benchmark.")
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--sizes", default="10000,100000",
+                        help="Comma-separated synthetic corpus sizes (chunks), e.g. 10000,100000,1000000.")
+    parser.add_argument("--dim", type=int, default=3072,
+                        help="Synthetic embedding dimension. Index memory is size x dim x 4 bytes "
+                             "(1M chunks at 3072 is ~12 GB); use e.g. --dim 768 for 1M-chunk corpora.")
+    parser.add_argument("--batch-queries", type=int, default=200, help="Queries in the batch checklist run.")
+    parser.add_argument("--burst-clients", type=int, default=32, help="Concurrent identical searches.")
+    parser.add_argument("--hedge-queries", type=int, default=200, help="Searches per pass in the hedging run.")
+    parser.add_argument("--hedge-deadline-ms", type=float, default=2000.0, help="Per-search deadline when hedging.")
+    parser.add_argument("--hedge-tail-prob", type=float, default=0.05, help="Share of slow chat calls.")
+    parser.add_argument("--hedge-tail-ms", type=float, default=3000.0, help="Latency of a slow chat call.")
+    parser.add_argument("--ingest-pages", type=int, default=200)
+    parser.add_argument("--startup-repeats", type=int, default=3)
+    parser.add_argument("--skip", default="", help="Comma-separated benchmarks to skip.")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json).")
+    add_latency_args(parser)
+    args = parser.parse_args(argv)
+    skip = set(filter(None, args.skip.split(",")))
+
+    server, base_url = start_mock_server(mock_from_args(args))
+    # Must be set before src.* is imported: the OpenAI client is created at import time
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+    # Work on a copy of the data directory, so background summary jobs never overwrite the real files
+    data_dir = tempfile.TemporaryDirectory(prefix="rag-bench-data-")
+    shutil.copytree(os.path.join(BACKEND_DIR, "data"), data_dir.name, dirs_exist_ok=True)
+    os.environ["DATA_PATH"] = data_dir.name
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": {},
+    }
+    results = report["results"]
+
+    if "startup" not in skip:
+        results["startup"] = bench_startup(args.startup_repeats)
+
+    if not {"search", "compare", "batch", "burst", "hedging"} <= skip:
+        from src.config.settings import FAISS_PATHS
+        from src.services.rag_services import RAGService
+
+        service = RAGService()
+        pdf_ids = list(FAISS_PATHS)
+        if "search" not in skip:
+            results["search"] = bench_search(service, pdf_ids, args.queries, args.top_k)
+        if "compare" not in skip and len(pdf_ids) >= 2:
+            results["compare"] = bench_compare(service, pdf_ids, args.queries, args.top_k)
+        if "batch" not in skip:
+            results["batch"] = bench_batch(service, pdf_ids[0], args.batch_queries, args.top_k)
+        if "burst" not in skip:
+            results["burst"] = bench_burst(service, server.mock, pdf_ids[0], args.burst_clients, args.top_k)
+        if "hedging" not in skip:
+            results["hedging"] = bench_hedging(service, server.mock, pdf_ids[0], args.hedge_queries, args.top_k,
+                                               args.hedge_deadline_ms, args.hedge_tail_prob, args.hedge_tail_ms)
+
+    if "ingest" not in skip:
+        results["ingest"] = bench_ingest(args.ingest_pages)
+
+    if "synthetic" not in skip:
+        sizes = [int(s) for s in args.sizes.split(",") if s]
+        results["synthetic_search"] = bench_synthetic_search(server.mock, sizes, args.dim, args.queries, args.top_k, args.seed)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    report["mock_calls"] = dict(server.mock.calls)
+    if "src.utils.utils" in sys.modules:
+        report["openai_pool"] = sys.modules["src.utils.utils"].get_pool_stats()
+    server.shutdown()
+    data_dir.cleanup()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(json.dumps(report["results"], indent=4))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,23 @@ load_dotenv()
 # OpenAI Key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Alternate OpenAI-compatible endpoint (e.g. the local benchmark stand-in)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+# OpenAI HTTP connection pool (shared by every request; sized to the server's worker threads)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "40"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "40"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "true").lower() == "true"
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
 SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 PROJECT_ROOT = os.path.dirname(SRC_DIR)
 
-DATA_PATH = os.path.join(PROJECT_ROOT, 'data')
+DATA_PATH = os.getenv("DATA_PATH", os.path.join(PROJECT_ROOT, 'data'))
 
 # Output Directory
 OUTPUT_PATH = DATA_PATH
@@ -28,11 +40,63 @@ FAISS_PATHS = {
     "pdf1": {
         "index": os.path.join(OUTPUT_PATH,"faiss_index_pdf1.idx"),
         "metadata": os.path.join(OUTPUT_PATH, "faiss_metadata_pdf1.csv"),
-        "summary": os.path.join(OUTPUT_PATH, "summary_pdf1.json")
+        "summary": os.path.join(OUTPUT_PATH, "summary_pdf1.json"),
+        "embedding_meta": os.path.join(OUTPUT_PATH, "faiss_index_pdf1.meta.json")
     },
     "pdf2": {
         "index": os.path.join(OUTPUT_PATH, "faiss_index_pdf2.idx"),
         "metadata": os.path.join(OUTPUT_PATH, "faiss_metadata_pdf2.csv"),
-        "summary": os.path.join(OUTPUT_PATH, "summary_pdf2.json")
+        "summary": os.path.join(OUTPUT_PATH, "summary_pdf2.json"),
+        "embedding_meta": os.path.join(OUTPUT_PATH, "faiss_index_pdf2.meta.json")
     },
 }
+
+# Page thumbnails (rendered at ingestion, lazily on a miss; least recently used evicted over budget)
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", os.path.join(DATA_PATH, "thumbnails"))
+THUMBNAIL_CACHE_MAX_MB = float(os.getenv("THUMBNAIL_CACHE_MAX_MB", "256"))
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "480"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "75"))
+THUMBNAIL_MAX_AGE_S = int(os.getenv("THUMBNAIL_MAX_AGE_S", "3600"))  # browser cache lifetime
+
+# Embedding backend: "openai" (remote) or "local" (sentence-transformers on CPU).
+# Indices record the backend/model that built them; queries from a different one are rejected.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_INT8 = os.getenv("LOCAL_EMBEDDING_INT8", "true").lower() == "true"
+LOCAL_EMBEDDING_MAX_BATCH = int(os.getenv("LOCAL_EMBEDDING_MAX_BATCH", "64"))
+LOCAL_EMBEDDING_MAX_WAIT_MS = float(os.getenv("LOCAL_EMBEDDING_MAX_WAIT_MS", "2"))
+
+# Request deadlines and hedged completions
+SEARCH_DEADLINE_S = float(os.getenv("SEARCH_DEADLINE_S", "15"))
+COMPARE_DEADLINE_S = float(os.getenv("COMPARE_DEADLINE_S", "25"))
+LLM_MIN_BUDGET_S = float(os.getenv("LLM_MIN_BUDGET_S", "0.5"))  # below this, skip generation and degrade
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_DEFAULT_DELAY_S = float(os.getenv("HEDGE_DEFAULT_DELAY_S", "3"))  # used until enough latencies are seen
+HEDGE_MIN_DELAY_S = float(os.getenv("HEDGE_MIN_DELAY_S", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+# Semantic answer cache (reuse answers for near-identical queries on the same index)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+# Coalesce identical in-flight searches into one computation
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+# A request joins a running search only if that search's deadline is no earlier than its own,
+# give or take this slack (absorbs arrival jitter between requests with the same timeout)
+SINGLE_FLIGHT_JOIN_SLACK_S = float(os.getenv("SINGLE_FLIGHT_JOIN_SLACK_S", "0.1"))
+
+# Batch search (checklist runs)
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+
+# Summaries (map-reduce over page groups, generated by background jobs)
+SUMMARY_GROUP_CHARS = int(os.getenv("SUMMARY_GROUP_CHARS", "24000"))
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "8"))
+SUMMARY_RETRY_S = float(os.getenv("SUMMARY_RETRY_S", "300"))  # wait after a failed generation before retrying
+
+# Observability
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "false").lower() == "true"
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "rag-market-analyzer")
@@ -1,22 +1,30 @@
 # backend/app/main.py
 import logging
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from src.routes.rag_routes import router as rag_router
 from src.routes.pdf_routes import router as pdf_router
 from contextlib import asynccontextmanager
-from src.services.rag_services import RAGService
+from src.utils.metrics import render_metrics
+from src.utils.utils import close_openai_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
-rag_service = RAGService()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled OpenAI connections on shutdown
+    close_openai_client()
 
 # Initialize FastAPI
 app = FastAPI(
     title="RAG-based Market Analyzer",
     version="1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Enable CORS
@@ -35,6 +43,12 @@ async def log_requests(request: Request, call_next):
     logging.info(f"Response status: {response.status_code}")
     return response
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 # Register routes
 app.include_router(rag_router, prefix="/api/rag", tags=["RAG Operations"])
 app.include_router(pdf_router, prefix="/api/pdf", tags=["PDF Operations"])
@@ -1,7 +1,8 @@
 # Initialize models package
-from .request_models import RAGQuery, CompareRequest
+from .request_models import RAGQuery, RAGBatchQuery, CompareRequest
 
 __all__ = [
     "RAGQuery",
+    "RAGBatchQuery",
     "CompareRequest",
 ]
@@ -1,13 +1,21 @@
 # backend/models/request_models.py
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
 
 class RAGQuery(BaseModel):
     query: str
     pdf_id: str
     top_k: int = 6
+    deadline_ms: Optional[int] = Field(default=None, gt=0)  # overrides the server's default time budget
+
+class RAGBatchQuery(BaseModel):
+    queries: List[str]
+    pdf_id: str
+    top_k: int = 6
 
 class CompareRequest(BaseModel):
     query: str
     pdf1_id: str
     pdf2_id: str
     top_k: int = 6
+    deadline_ms: Optional[int] = Field(default=None, gt=0)  # overrides the server's default time budget
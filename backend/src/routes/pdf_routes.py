@@ -1,20 +1,87 @@
 # backend/routes/pdf_routes.py
 import os
-from fastapi import APIRouter, HTTPException
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import APIRouter, HTTPException, Path, Request, Response
 from fastapi.responses import FileResponse
+from src.config.settings import DATA_PATH, PDF_FILES, THUMBNAIL_MAX_AGE_S
+from src.utils.thumbnails import thumbnail_cache, pdf_version
 
 router = APIRouter()
 
-PDF_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+PDF_DIRECTORY = DATA_PATH
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """
+    True if the client's cached copy is current (If-None-Match takes precedence over If-Modified-Since).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def validator_headers(etag: str, mtime: float, cache_control: str) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+def cached_file_response(request: Request, path: str, media_type: str, etag: str, mtime: float,
+                         cache_control: str):
+    """
+    Serve a file with validators: 304 when the client's copy is current, otherwise the file
+    (FileResponse answers Range/If-Range requests with 206 partial content).
+    """
+    headers = validator_headers(etag, mtime, cache_control)
+    if not_modified(request, etag, mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 @router.get("/{filename}")
-def get_pdf(filename: str):
+def get_pdf(filename: str, request: Request):
     """
     Serve a PDF file to the frontend.
+    Viewers can revalidate with ETag/Last-Modified and load the document incrementally with byte ranges.
     """
-    pdf_path = os.path.join(PDF_DIRECTORY, filename)
+    pdf_path = os.path.join(PDF_DIRECTORY, os.path.basename(filename))
 
     if not os.path.exists(pdf_path):
         raise HTTPException(status_code=404, detail="PDF not found")
 
-    return FileResponse(pdf_path, media_type="application/pdf")
+    stat_result = os.stat(pdf_path)
+    # Same URL for every version of the file, so always revalidate (cheap 304 when unchanged)
+    return cached_file_response(request, pdf_path, "application/pdf", f'"{pdf_version(pdf_path, stat_result)}"',
+                                stat_result.st_mtime, "no-cache")
+
+@router.get("/{doc}/page/{page}.webp")
+def get_page_thumbnail(doc: str, request: Request, page: int = Path(..., ge=1)):
+    """
+    Serve a WebP thumbnail of one page (1-based) for citation previews.
+    `doc` is a PDF id (e.g. pdf1) or file name. Thumbnails are pre-rendered at ingestion and
+    rendered on first request otherwise.
+    """
+    pdf_path = PDF_FILES.get(doc) or os.path.join(PDF_DIRECTORY, os.path.basename(doc))
+
+    if not os.path.exists(pdf_path):
+        raise HTTPException(status_code=404, detail="PDF not found")
+
+    stat_result = os.stat(pdf_path)
+    etag = f'"{pdf_version(pdf_path, stat_result)}-{page}-{thumbnail_cache.width}"'
+    cache_control = f"public, max-age={THUMBNAIL_MAX_AGE_S}"
+    # Validate before touching the cache: a current client copy needs no file at all
+    if not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=validator_headers(etag, stat_result.st_mtime, cache_control))
+
+    thumbnail_path = thumbnail_cache.get(pdf_path, page)
+    if thumbnail_path is None:
+        raise HTTPException(status_code=404, detail=f"Page {page} not found")
+    return cached_file_response(request, thumbnail_path, "image/webp", etag, stat_result.st_mtime, cache_control)
@@ -1,7 +1,10 @@
 # backend/routes/rag_routes.py
+import json
 from fastapi import APIRouter, HTTPException
-from src.models.request_models import RAGQuery, CompareRequest
+from fastapi.responses import StreamingResponse
+from src.models.request_models import RAGQuery, RAGBatchQuery, CompareRequest
 from src.services.rag_services import RAGService
+from src.utils.hedging import Deadline, DeadlineExceeded
 
 router = APIRouter()
 
@@ -11,6 +14,10 @@ rag_service = RAGService()
 # async def root():
 #     return {"message": "RAG API Root"}
 
+def request_deadline(data):
+    """Deadline from the request's deadline_ms, or None to use the service default."""
+    return Deadline(data.deadline_ms / 1000) if data.deadline_ms is not None else None
+
 @router.get("/summaries")
 def get_summaries():
     """
@@ -24,10 +31,24 @@ def rag_search(data: RAGQuery):
     Processes a query and returns AI-generated answers using FAISS similarity search.
     """
     try:
-        result = rag_service.rag_search_service(data.query, data.pdf_id, data.top_k)
+        result = rag_service.rag_search_service(data.query, data.pdf_id, data.top_k, request_deadline(data))
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+@router.post("/search/batch")
+def rag_search_batch(data: RAGBatchQuery):
+    """
+    Runs a list of queries against one PDF and streams results as NDJSON, one line per query as it completes.
+    """
+    try:
+        results = rag_service.rag_search_batch_service(data.queries, data.pdf_id, data.top_k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse((json.dumps(result) + "\n" for result in results), media_type="application/x-ndjson")
 
 @router.post("/compare/")
 def compare_pdfs(request: CompareRequest):
@@ -35,7 +56,10 @@ def compare_pdfs(request: CompareRequest):
     Retrieves relevant content from two PDFs and generates a comparative answer.
     """
     try:
-        result = rag_service.compare_pdfs_service(request.query, request.pdf1_id, request.pdf2_id, request.top_k)
+        result = rag_service.compare_pdfs_service(request.query, request.pdf1_id, request.pdf2_id, request.top_k,
+                                                  request_deadline(request))
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
@@ -1,94 +1,249 @@
 # backend/services/rag_service.py
-import json
 import os
 import re
 import logging
+import time
+import threading
+import concurrent.futures
+import openai
 from fastapi import HTTPException
-from src.utils.utils import DocumentProcessor, load_json, save_json, FAISSManager, ContentChunker, Comparison
-from src.config.settings import OUTPUT_PATH, PDF_FILES, FAISS_PATHS
+from src.utils.utils import (
+    DocumentProcessor, load_json, save_json, FAISSManager, ContentChunker, Comparison, OpenAIClient, SUMMARY_ERROR
+)
+from src.utils.semantic_cache import SemanticCache
+from src.utils.single_flight import SingleFlight
+from src.utils.hedging import Deadline, DeadlineExceeded
+from src.config.settings import (
+    OUTPUT_PATH, PDF_FILES, FAISS_PATHS,
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES,
+    BATCH_MAX_QUERIES, BATCH_CONCURRENCY, SINGLE_FLIGHT_ENABLED, SINGLE_FLIGHT_JOIN_SLACK_S,
+    SEARCH_DEADLINE_S, COMPARE_DEADLINE_S, LLM_MIN_BUDGET_S, SUMMARY_RETRY_S
+)
+from src.utils.metrics import span, record_cache, record_degraded
+
+SUMMARY_PENDING = "Summary is being generated. Please check back shortly."
 
 class RAGService:
-    def __init__(self):
+    def __init__(self, openai_client=None):
         """Initialize RAG Service."""
+        # One client (and connection pool) shared by every manager and processor
+        self.openai_client = openai_client or OpenAIClient()
+        self.faiss_managers = {
+            pdf_id: FAISSManager(FAISS_PATHS, pdf_id, self.openai_client) for pdf_id in FAISS_PATHS
+        }
+        self.processors = {
+            pdf_id: DocumentProcessor(pdf_id, pdf_path, FAISS_PATHS, self.openai_client)
+            for pdf_id, pdf_path in PDF_FILES.items()
+        }
+        self.comparison = Comparison(self.openai_client)
+        self.answer_cache = (
+            SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES) if SEMANTIC_CACHE_ENABLED else None
+        )
+        self.index_versions = {}
+        self.search_flights = SingleFlight("rag_search", SINGLE_FLIGHT_JOIN_SLACK_S) if SINGLE_FLIGHT_ENABLED else None
+
+        # In-memory summaries: pdf_id -> (summary file mtime, index version, summary, outdated)
+        self._summaries = {}
+        self._summary_jobs = {}
+        self._summary_retry_at = {}  # pdf_id -> monotonic time before which a failed job is not rescheduled
+        self._summary_lock = threading.Lock()
+        self._summary_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+
         os.makedirs(OUTPUT_PATH, exist_ok=True)
         for pdf_id, pdf_path in PDF_FILES.items():
             if not os.path.exists(FAISS_PATHS[pdf_id]["index"]):
                 logging.info(f"Processing {pdf_id} PDF for FAISS index...")
 
-                document_processor = DocumentProcessor(pdf_id, pdf_path, FAISS_PATHS)
-                doc = document_processor.process()
+                with span("ingest"):
+                    doc = self.processors[pdf_id].process()
 
-                chunker = ContentChunker(doc)
-                content = chunker.chunk()
+                    with span("ingest_chunk"):
+                        chunker = ContentChunker(doc)
+                        content = chunker.chunk()
 
-                clean_content = chunker.cleanup(content)
+                        clean_content = chunker.cleanup(content)
 
-                faiss_manager = FAISSManager(FAISS_PATHS, pdf_id)
-                faiss_manager.save_faiss_index(clean_content)
+                    self.faiss_managers[pdf_id].save_faiss_index(clean_content)
 
         self.generate_summaries_and_indices()  # Uses existing get_summaries method
 
     def generate_summaries_and_indices(self):
         """
-        Returns summaries for all PDFs.
-        If a summary file is missing, it generates and saves it.
+        Loads the FAISS indices and warms the summary cache.
+        Missing or outdated summaries are generated by a background job.
         """
         global faiss_indices
         faiss_indices = {}
 
         for pdf_id, paths in FAISS_PATHS.items():
-            faiss_manager = FAISSManager(FAISS_PATHS, pdf_id)
-
-            index, df_metadata = faiss_manager.load_faiss_index()
-            summary_path = paths["summary"]
-
-            # Check if summary already exists or generate if missing
-            if not os.path.exists(summary_path):
-                logging.info(f"Summary for {pdf_id} missing. Generating...")
-                processor = DocumentProcessor(pdf_id, PDF_FILES[pdf_id], FAISS_PATHS)
-
-                doc = processor.process()
-            else:
-                with open(paths["summary"], "r") as f:
-                    summary = json.load(f)  # Load existing summary
-
+            index, df_metadata = self.faiss_managers[pdf_id].load_faiss_index()
+            self.index_versions[pdf_id] = self.faiss_managers[pdf_id].index_version()
             faiss_indices[pdf_id] = (index, df_metadata)
 
-    def get_summaries_service(self):
-        summaries = {}
-
-        for pdf_id, paths in FAISS_PATHS.items():
-            summary_path = paths["summary"]
-
-            # Check if summary exists, generate if not
-            if not os.path.exists(summary_path):
-                print(f"Generating summary for {pdf_id}...")
-                processor = DocumentProcessor(pdf_id, PDF_FILES[pdf_id], FAISS_PATHS)
-                doc = processor.process()  # Generate summary
-                summary = doc.get("summary", "No summary available.")
-
-                # Save generated summary
-                with open(summary_path, "w") as f:
-                    json.dump({os.path.basename(PDF_FILES[pdf_id]): summary}, f, indent=4)
-            else:
-                with open(summary_path, "r") as f:
-                    summary_data = json.load(f)
-                summary = summary_data.get(os.path.basename(PDF_FILES[pdf_id]), "No summary available.")
-
-            summaries[pdf_id] = summary  # Store summary in dictionary
+        for pdf_id in FAISS_PATHS:
+            self._get_summary(pdf_id)
 
+    def get_summaries_service(self):
+        """
+        Returns summaries for all PDFs from memory; never generates inside the request.
+        """
+        summaries = {pdf_id: self._get_summary(pdf_id) for pdf_id in FAISS_PATHS}
         return {"summaries": summaries}
 
-    def rag_search_service(self, query, pdf_id, top_k):
+    def _get_summary(self, pdf_id):
+        summary_path = FAISS_PATHS[pdf_id]["summary"]
+        try:
+            mtime = os.stat(summary_path).st_mtime_ns
+        except FileNotFoundError:
+            record_cache("summary", False)
+            self._schedule_summary(pdf_id)
+            return SUMMARY_PENDING
+
+        index_version = self.index_versions.get(pdf_id)
+        cached = self._summaries.get(pdf_id)
+        if cached is not None and cached[:2] == (mtime, index_version):
+            record_cache("summary", True)
+            if cached[3]:
+                # Outdated summary: keep serving it, and retry generation once any backoff has passed
+                self._schedule_summary(pdf_id)
+            return cached[2]
+
+        # Summary file or index changed since it was cached: reload from disk
+        record_cache("summary", False)
+        data = load_json(summary_path)
+        summary = data.get(os.path.basename(PDF_FILES[pdf_id]), "No summary available.")
+
+        # A summary recorded against another index build describes a previous version of the document.
+        # Summaries without a recorded build predate versioning and are kept.
+        summary_version = data.get("index_version")
+        outdated = summary_version is not None and summary_version != index_version
+        self._summaries[pdf_id] = (mtime, index_version, summary, outdated)
+        if outdated:
+            self._schedule_summary(pdf_id)
+        return summary
+
+    def _schedule_summary(self, pdf_id):
+        with self._summary_lock:
+            job = self._summary_jobs.get(pdf_id)
+            if job is not None and not job.done():
+                return
+            if time.monotonic() < self._summary_retry_at.get(pdf_id, 0):
+                return
+            logging.info(f"Scheduling summary generation for {pdf_id}...")
+            self._summary_jobs[pdf_id] = self._summary_executor.submit(self._generate_summary, pdf_id)
+
+    def _generate_summary(self, pdf_id):
+        """Background job: map-reduce summary over the indexed chunks (no re-rasterization)."""
+        _, df_metadata = faiss_indices[pdf_id]
+        index_version = self.index_versions[pdf_id]
+        with span("summarize"):
+            summary = self.processors[pdf_id].summarizer.summarize_pages(df_metadata["content"].astype(str).tolist())
+
+        if summary == SUMMARY_ERROR:
+            with self._summary_lock:
+                self._summary_retry_at[pdf_id] = time.monotonic() + SUMMARY_RETRY_S
+            logging.error(f"Summary generation for {pdf_id} failed; retrying after {SUMMARY_RETRY_S:.0f}s.")
+            return
+
+        # The next request sees the new mtime and reloads it into memory
+        save_json(FAISS_PATHS[pdf_id]["summary"],
+                  {os.path.basename(PDF_FILES[pdf_id]): summary, "index_version": index_version})
+        logging.info(f"Summary for {pdf_id} saved.")
+
+    def rag_search_service(self, query, pdf_id, top_k, deadline=None):
         """
         Perform RAG search and return results.
+        If the deadline is too close for generation, returns the source chunks without an answer.
         """
         if pdf_id not in faiss_indices:
             raise HTTPException(status_code=400, detail=f"Invalid PDF ID: {pdf_id} (No FAISS index found)")
 
-        faiss_manager = FAISSManager(FAISS_PATHS, pdf_id)
-        similar_results = faiss_manager.search_faiss(query, faiss_indices, top_k)
-
+        deadline = deadline or Deadline(SEARCH_DEADLINE_S)
+        with span("rag_search"):
+            if self.search_flights is None:
+                return self._rag_search(query, pdf_id, top_k, deadline)
+
+            # Identical concurrent requests share one embedding, search and completion, as long as
+            # the running one has no shorter deadline than ours
+            key = (" ".join(query.lower().split()), pdf_id, top_k)
+            try:
+                # Stop waiting while there is still time for our own retrieval
+                return self.search_flights.do(key, self._rag_search, query, pdf_id, top_k, deadline,
+                                              timeout=max(0.0, deadline.remaining() - LLM_MIN_BUDGET_S),
+                                              expires_at=deadline.expires_at)
+            except concurrent.futures.TimeoutError as e:
+                if isinstance(e, DeadlineExceeded):
+                    raise
+                # The shared search is too slow for this request: degrade to its own source chunks
+                return self._rag_search(query, pdf_id, top_k, deadline)
+
+    def _rag_search(self, query, pdf_id, top_k, deadline=None):
+        faiss_manager = self.faiss_managers[pdf_id]
+        query_embedding = self._embed_query(faiss_manager, query, deadline)
+
+        # Serve near-identical queries from the semantic cache
+        cached = self._cache_lookup(query_embedding, pdf_id, top_k)
+        if cached is not None:
+            similar_results = faiss_manager.fetch_chunks(query_embedding, cached["chunk_ids"], faiss_indices)
+        else:
+            similar_results = faiss_manager.search_by_embedding(query_embedding, faiss_indices, top_k)
+
+        return self._build_answer(query, pdf_id, top_k, query_embedding, similar_results, cached, deadline)
+
+    def rag_search_batch_service(self, queries, pdf_id, top_k):
+        """
+        Perform RAG search for a list of queries against one PDF.
+        Retrieval is batched up front; returns a generator that yields each result as its answer completes.
+        """
+        if pdf_id not in faiss_indices:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF ID: {pdf_id} (No FAISS index found)")
+        if not queries:
+            raise ValueError("At least one query is required.")
+        if len(queries) > BATCH_MAX_QUERIES:
+            raise ValueError(f"Too many queries: {len(queries)} (max {BATCH_MAX_QUERIES})")
+
+        faiss_manager = self.faiss_managers[pdf_id]
+        with span("rag_search_batch_retrieve"):
+            # One embeddings request and one index.search for every query not served from cache
+            query_embeddings = faiss_manager.embed_queries(queries)
+            cached = [self._cache_lookup(embedding, pdf_id, top_k) for embedding in query_embeddings]
+
+            retrieved = {}
+            misses = [i for i, entry in enumerate(cached) if entry is None]
+            if misses:
+                retrieved.update(zip(misses, faiss_manager.search_batch(query_embeddings[misses], faiss_indices, top_k)))
+            for i, entry in enumerate(cached):
+                if entry is not None:
+                    retrieved[i] = faiss_manager.fetch_chunks(query_embeddings[i], entry["chunk_ids"], faiss_indices)
+
+        return self._answer_batch(queries, pdf_id, top_k, query_embeddings, retrieved, cached)
+
+    def _answer_batch(self, queries, pdf_id, top_k, query_embeddings, retrieved, cached):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(queries)))
+        try:
+            futures = {
+                executor.submit(self._build_answer, queries[i], pdf_id, top_k,
+                                query_embeddings[i], retrieved[i], cached[i]): i
+                for i in range(len(queries))
+            }
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"Batch query {i} failed: {e}")
+                    result = {"error": str(e)}
+                yield {"index": i, "query": queries[i], **result}
+        finally:
+            # Stop queued generations if the client goes away mid-stream
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cache_lookup(self, query_embedding, pdf_id, top_k):
+        if self.answer_cache is None:
+            return None
+        return self.answer_cache.lookup(query_embedding, pdf_id, self.index_versions[pdf_id], top_k)
+
+    def _build_answer(self, query, pdf_id, top_k, query_embedding, similar_results, cached, deadline=None):
         if not similar_results:
             return {"answer": "No relevant content found.", "source_chunks": []}
 
@@ -103,31 +258,75 @@ class RAGService:
             }
             for i, result in enumerate(similar_results)
         ]
-        processor = DocumentProcessor(pdf_id, PDF_FILES[pdf_id], FAISS_PATHS)
-        answer = processor.generate_output(query, similar_results)
-
-        formatted_answer = self.format_ai_response(answer)
+        if cached is not None:
+            formatted_answer = cached["answer"]
+        else:
+            try:
+                self._check_budget(deadline)
+                with span("generate_answer"):
+                    answer = self.processors[pdf_id].generate_output(query, similar_results, deadline=deadline)
+            except Exception as e:
+                # Running out of time or an upstream failure still returns the retrieved passages
+                logging.warning(f"Search for {pdf_id} degraded to source chunks only ({type(e).__name__}): {e}")
+                record_degraded("search")
+                return {"answer": None, "source_chunks": source_chunks, "degraded": True}
+
+            formatted_answer = self.format_ai_response(answer)
+
+            if self.answer_cache is not None:
+                self.answer_cache.store(query_embedding, pdf_id, self.index_versions[pdf_id], top_k, query,
+                                        formatted_answer, [r["index"] for r in similar_results])
 
         return {
             "answer": formatted_answer,
             "source_chunks": source_chunks,
         }
 
-    def compare_pdfs_service(self, query, pdf1_id, pdf2_id, top_k):
+    def compare_pdfs_service(self, query, pdf1_id, pdf2_id, top_k, deadline=None):
         """
         Retrieves relevant content from two PDFs and generates a comparative answer using OpenAI.
+        If the deadline is too close for generation, returns the source chunks without a response.
         """
+        with span("compare"):
+            return self._compare_pdfs(query, pdf1_id, pdf2_id, top_k, deadline or Deadline(COMPARE_DEADLINE_S))
+
+    @staticmethod
+    def _embed_query(faiss_manager, query, deadline):
+        try:
+            return faiss_manager.embed_query(query, deadline.remaining() if deadline else None)
+        except (openai.APITimeoutError, concurrent.futures.TimeoutError) as e:
+            # Without an embedding there is nothing to degrade to
+            raise DeadlineExceeded("Query embedding did not finish within the deadline") from e
+
+    @staticmethod
+    def _check_budget(deadline):
+        if deadline is not None and deadline.remaining() < LLM_MIN_BUDGET_S:
+            raise DeadlineExceeded(f"Only {deadline.remaining():.2f}s left, not enough to generate an answer")
+
+    def _compare_pdfs(self, query, pdf1_id, pdf2_id, top_k, deadline):
+        for pdf_id in (pdf1_id, pdf2_id):
+            if pdf_id not in self.faiss_managers:
+                raise HTTPException(status_code=400, detail="Invalid PDF ID")
+
+        # Both indices must share the query's embedding space; then one embedding serves both searches
+        self.faiss_managers[pdf2_id]._check_embedding_compatible()
+        query_embedding = self._embed_query(self.faiss_managers[pdf1_id], query, deadline)
+        results_pdf1, results_pdf2 = [
+            self.faiss_managers[pdf_id].search_by_embedding(query_embedding, faiss_indices, top_k)
+            for pdf_id in (pdf1_id, pdf2_id)
+        ]
 
-        faiss_manager_1 = FAISSManager(FAISS_PATHS, pdf1_id)
-        results_pdf1 = faiss_manager_1.search_faiss(query, faiss_indices, top_k)
-
-        faiss_manager_2 = FAISSManager(FAISS_PATHS, pdf2_id)
-        results_pdf2 = faiss_manager_2.search_faiss(query, faiss_indices, top_k)
-
-        compare = Comparison()
-        response = compare.generate_comparison_answer(query, results_pdf1, results_pdf2)
-        # Format the AI output for clarity
-        formatted_response = self.format_ai_response(response)
+        try:
+            self._check_budget(deadline)
+            with span("generate_comparison"):
+                response = self.comparison.generate_comparison_answer(query, results_pdf1, results_pdf2,
+                                                                      deadline=deadline)
+            # Format the AI output for clarity
+            formatted_response = self.format_ai_response(response)
+        except Exception as e:
+            logging.warning(f"Comparison degraded to source chunks only ({type(e).__name__}): {e}")
+            record_degraded("compare")
+            formatted_response = None
 
         def shorten_chunks(chunks, max_length=600):
             """Truncate long content for frontend display."""
@@ -144,12 +343,15 @@ class RAGService:
         source_chunks_pdf1 = shorten_chunks(results_pdf1)
         source_chunks_pdf2 = shorten_chunks(results_pdf2)
 
-        return {
+        result = {
             "query": query,
             "response": formatted_response,
             "source_chunks_pdf1": source_chunks_pdf1 if source_chunks_pdf1 else [],
             "source_chunks_pdf2": source_chunks_pdf2 if source_chunks_pdf2 else [],
         }
+        if formatted_response is None:
+            result["degraded"] = True
+        return result
 
     import re
 
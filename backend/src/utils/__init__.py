@@ -10,3 +10,5 @@ from .utils import (
     DocumentProcessor,
     Comparison
 )
+from .semantic_cache import SemanticCache
+from .single_flight import SingleFlight
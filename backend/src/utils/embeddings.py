@@ -0,0 +1,211 @@
+# backend/utils/embeddings.py
+import abc
+import time
+import queue
+import logging
+import threading
+import concurrent.futures
+import numpy as np
+
+from src.config.settings import (
+    EMBEDDING_BACKEND, OPENAI_MAX_RETRIES, OPENAI_EMBEDDING_MODEL, LOCAL_EMBEDDING_MODEL, LOCAL_EMBEDDING_INT8,
+    LOCAL_EMBEDDING_MAX_BATCH, LOCAL_EMBEDDING_MAX_WAIT_MS
+)
+from src.utils.metrics import record_token_usage
+from src.utils.hedging import is_retryable, retry_backoff
+
+
+# ----------------------------------------------------------
+# Embedding Backend Interface
+# ----------------------------------------------------------
+class EmbeddingBackend(abc.ABC):
+    """Turns a list of texts into a (n, d) float32 matrix."""
+
+    name = "base"
+
+    def __init__(self, model):
+        self.model = model
+
+    @abc.abstractmethod
+    def embed(self, texts, timeout=None):
+        ...
+
+    def describe(self):
+        """Identity recorded next to every index built with this backend."""
+        return {"backend": self.name, "model": self.model}
+
+
+# ----------------------------------------------------------
+# OpenAI Embeddings
+# ----------------------------------------------------------
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """Remote embeddings through the shared OpenAI client."""
+
+    name = "openai"
+    max_inputs = 2048  # API limit per request
+    # The API also caps the summed tokens of a request (300k); at >= 2 chars/token this stays under it
+    max_chars = 600_000
+
+    def __init__(self, client, model=OPENAI_EMBEDDING_MODEL):
+        super().__init__(model)
+        self.client = client
+
+    def embed(self, texts, timeout=None):
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        vectors = []
+        for batch in self._batches(texts):
+            response = self._create(batch, expires_at)
+            record_token_usage(self.model, getattr(response, "usage", None))
+            # Responses carry an index per input; don't rely on ordering
+            data = sorted(response.data, key=lambda d: d.index)
+            vectors.extend(d.embedding for d in data)
+        return np.array(vectors, dtype=np.float32)
+
+    def _batches(self, texts):
+        """Consecutive slices of `texts` within both the input-count and the summed-size budget."""
+        batch, size = [], 0
+        for text in texts:
+            if batch and (len(batch) == self.max_inputs or size + len(text) > self.max_chars):
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text)
+        if batch:
+            yield batch
+
+    def _create(self, inputs, expires_at):
+        if expires_at is None:
+            return self.client.embeddings.create(model=self.model, input=inputs)
+
+        # A caller-supplied timeout is a budget: retry only while it lasts (SDK retries are not bounded by it)
+        client = self.client.with_options(max_retries=0)
+        for attempt in range(OPENAI_MAX_RETRIES + 1):
+            try:
+                return client.embeddings.create(model=self.model, input=inputs,
+                                                timeout=max(0.0, expires_at - time.monotonic()))
+            except Exception as e:
+                backoff = retry_backoff(attempt)
+                if attempt == OPENAI_MAX_RETRIES or not is_retryable(e) or \
+                        expires_at - time.monotonic() <= backoff:
+                    raise
+                time.sleep(backoff)
+
+
+# ----------------------------------------------------------
+# Local CPU Embeddings (sentence-transformers)
+# ----------------------------------------------------------
+_local_models = {}
+_local_models_lock = threading.Lock()
+
+
+def _load_local_model(model_name, int8):
+    """Load (once per process) a sentence-transformers model on CPU, optionally int8-quantized."""
+    key = (model_name, int8)
+    with _local_models_lock:
+        if key not in _local_models:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise RuntimeError(
+                    "EMBEDDING_BACKEND=local requires the 'sentence-transformers' package"
+                ) from e
+
+            logging.info(f"Loading local embedding model {model_name} (int8={int8})...")
+            model = SentenceTransformer(model_name, device="cpu")
+            if int8:
+                import torch
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            model.eval()
+            _local_models[key] = model
+        return _local_models[key]
+
+
+class _MicroBatcher:
+    """
+    Collects embedding requests from concurrent threads and encodes them together: a batch is
+    flushed once it holds `max_batch` texts or `max_wait_ms` has passed since its first request.
+    """
+
+    def __init__(self, encode, max_batch, max_wait_ms):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def submit(self, texts):
+        future = concurrent.futures.Future()
+        self._queue.put((texts, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch):
+        texts = [text for item_texts, _ in batch for text in item_texts]
+        try:
+            vectors = self.encode(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for item_texts, future in batch:
+            future.set_result(vectors[start:start + len(item_texts)])
+            start += len(item_texts)
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """In-process CPU embeddings; the model is loaded once and shared by all threads."""
+
+    name = "local"
+
+    def __init__(self, model=LOCAL_EMBEDDING_MODEL, int8=LOCAL_EMBEDDING_INT8,
+                 max_batch=LOCAL_EMBEDDING_MAX_BATCH, max_wait_ms=LOCAL_EMBEDDING_MAX_WAIT_MS):
+        super().__init__(model)
+        self.int8 = int8
+        self._model = _load_local_model(model, int8)
+        self._batcher = _MicroBatcher(self._encode, max_batch, max_wait_ms)
+
+    def _encode(self, texts):
+        return self._model.encode(
+            texts, batch_size=self._batcher.max_batch, convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32)
+
+    def embed(self, texts, timeout=None):
+        return self._batcher.submit(list(texts)).result(timeout)
+
+    def describe(self):
+        return {**super().describe(), "quantization": "int8" if self.int8 else "none"}
+
+
+_local_backend = None
+_local_backend_lock = threading.Lock()
+
+
+def get_embedding_backend(client):
+    """Backend selected by EMBEDDING_BACKEND; the local backend is a process-wide singleton."""
+    global _local_backend
+    if EMBEDDING_BACKEND == "local":
+        with _local_backend_lock:
+            if _local_backend is None:
+                _local_backend = LocalEmbeddingBackend()
+            return _local_backend
+    if EMBEDDING_BACKEND != "openai":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+    return OpenAIEmbeddingBackend(client)
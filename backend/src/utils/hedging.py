@@ -0,0 +1,170 @@
+# backend/utils/hedging.py
+import time
+import random
+import threading
+import collections
+import concurrent.futures
+import numpy as np
+import openai
+
+from src.config.settings import (
+    OPENAI_MAX_CONNECTIONS, OPENAI_MAX_RETRIES, HEDGE_ENABLED, HEDGE_DEFAULT_DELAY_S, HEDGE_MIN_DELAY_S, HEDGE_MIN_SAMPLES
+)
+from src.utils.metrics import record_hedge
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before the work finished."""
+
+
+class Deadline:
+    """An absolute point in time carried through the service layer for one request."""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def is_retryable(error):
+    """Failures worth another attempt: rate limits, server errors, connection errors and timeouts."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (openai.APIConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_backoff(attempt):
+    """Jittered exponential backoff before retry number `attempt` (0-based), as the SDK does."""
+    return min(0.5 * 2 ** attempt, 8.0) * random.uniform(0.75, 1.0)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used to pick the hedge delay."""
+
+    def __init__(self, window=256):
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, default):
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return default
+            return float(np.percentile(self._samples, q))
+
+
+# Hedged calls run here so the request thread can wait on whichever finishes first
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=OPENAI_MAX_CONNECTIONS, thread_name_prefix="hedge")
+
+
+class _Attempt:
+    """One submitted call; `started_at` is set once it leaves the executor queue."""
+
+    def __init__(self, hedge):
+        self.hedge = hedge
+        self.started_at = None
+        self.future = None
+
+
+class Hedger:
+    """
+    Runs a call under a deadline. If the call is still running after the p95 latency observed for
+    the same kind of call (timed from when it started, not from when it was queued), a duplicate
+    is fired and whichever finishes first wins. A call still waiting for an executor thread is
+    never hedged, since the duplicate would only join the same queue. Retryable failures are
+    resubmitted (up to OPENAI_MAX_RETRIES, with backoff) while budget remains; this stands in
+    for the SDK's own retries, which are not deadline-aware.
+
+    `fn(timeout)` must honour its per-call timeout: the losing call cannot be interrupted
+    mid-request, so it is cancelled if still queued and otherwise abandoned, ending no later
+    than the deadline.
+    """
+
+    def __init__(self, enabled=HEDGE_ENABLED):
+        self.enabled = enabled
+        self._trackers = collections.defaultdict(LatencyTracker)
+
+    def hedge_delay(self, kind):
+        p95 = self._trackers[kind].percentile(95, HEDGE_DEFAULT_DELAY_S)
+        return max(HEDGE_MIN_DELAY_S, p95)
+
+    def call(self, kind, fn, deadline):
+        if deadline.expired():
+            raise DeadlineExceeded(f"No time left for {kind}")
+
+        tracker = self._trackers[kind]
+        delay = self.hedge_delay(kind)
+        primary = self._submit(fn, deadline, tracker)
+        attempts = {primary.future: primary}
+        hedged = not self.enabled
+        error = None
+        retries = 0
+
+        while attempts and not deadline.expired():
+            timeout = deadline.remaining()
+            if not hedged:
+                if primary.started_at is None:
+                    # Still queued: check again shortly instead of adding a duplicate to the queue
+                    timeout = min(timeout, HEDGE_MIN_DELAY_S)
+                elif time.monotonic() >= primary.started_at + delay:
+                    hedged = True
+                    record_hedge("fired")
+                    hedge = self._submit(fn, deadline, tracker, hedge=True)
+                    attempts[hedge.future] = hedge
+                else:
+                    timeout = min(timeout, primary.started_at + delay - time.monotonic())
+
+            done, _ = concurrent.futures.wait(attempts, timeout=timeout,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                attempt = attempts.pop(future)
+                if future.exception() is None:
+                    for loser in attempts:
+                        loser.cancel()
+                    if attempt.hedge:
+                        record_hedge("won")
+                    return future.result()
+                error = future.exception()
+                backoff = retry_backoff(retries)
+                if retries < OPENAI_MAX_RETRIES and is_retryable(error) and deadline.remaining() > backoff:
+                    retries += 1
+                    record_hedge("retried")
+                    retry = self._submit(fn, deadline, tracker, delay=backoff)
+                    attempts[retry.future] = retry
+                    if attempt is primary:
+                        primary = retry
+
+        for loser in attempts:
+            loser.cancel()
+        if error is not None and not deadline.expired():
+            raise error
+        raise DeadlineExceeded(f"{kind} did not finish within the deadline") from error
+
+    @staticmethod
+    def _submit(fn, deadline, tracker, hedge=False, delay=0.0):
+        attempt = _Attempt(hedge)
+
+        def run():
+            if delay:
+                time.sleep(delay)
+            if deadline.expired():
+                raise DeadlineExceeded("Deadline passed while the call was queued")
+            attempt.started_at = time.monotonic()
+            result = fn(deadline.remaining())
+            # Execution time only: queueing is excluded so the hedge delay tracks the upstream
+            tracker.record(time.monotonic() - attempt.started_at)
+            return result
+
+        attempt.future = _executor.submit(run)
+        return attempt
@@ -0,0 +1,176 @@
+# backend/utils/metrics.py
+import time
+import logging
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+from src.config.settings import METRICS_ENABLED, OTEL_ENABLED, OTEL_SERVICE_NAME
+
+# ----------------------------------------------------------
+# Prometheus Metrics
+# ----------------------------------------------------------
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each stage of the RAG pipeline.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+TOKEN_USAGE = Counter(
+    "rag_openai_tokens_total",
+    "Tokens reported by OpenAI responses.",
+    ["model", "kind"],
+)
+
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    ["cache", "result"],
+)
+
+LLM_HEDGES = Counter(
+    "rag_llm_hedges_total",
+    "Hedged completions: 'fired' when a duplicate was sent, 'won' when the duplicate returned first.",
+    ["outcome"],
+)
+
+DEGRADED_RESPONSES = Counter(
+    "rag_degraded_responses_total",
+    "Responses returned without a generated answer because the deadline was too close.",
+    ["endpoint"],
+)
+
+COALESCED_REQUESTS = Counter(
+    "rag_coalesced_requests_total",
+    "Requests handled by single-flight groups, by role (leader ran it, follower shared its result).",
+    ["name", "role"],
+)
+
+OPENAI_POOL_ACQUIRE = Histogram(
+    "rag_openai_pool_acquire_seconds",
+    "Time from request start until headers are sent (pool wait plus connection setup).",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+OPENAI_POOL_CONNECTS = Counter(
+    "rag_openai_pool_connections_opened_total",
+    "New TCP connections opened by the OpenAI connection pool.",
+)
+
+OPENAI_POOL_IN_FLIGHT = Gauge(
+    "rag_openai_pool_in_flight",
+    "OpenAI requests currently waiting for or holding a pooled connection.",
+)
+
+OPENAI_POOL_CONNECTIONS = Gauge(
+    "rag_openai_pool_connections",
+    "Connections held by the OpenAI pool by state.",
+    ["state"],
+)
+
+
+# ----------------------------------------------------------
+# Optional OpenTelemetry Tracer
+# ----------------------------------------------------------
+def _init_tracer():
+    if not OTEL_ENABLED:
+        return None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError as e:
+        logging.warning(f"OpenTelemetry requested but not installed, tracing disabled: {e}")
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer(__name__)
+
+
+tracer = _init_tracer()
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a pipeline stage into the stage histogram (and an OTel span if enabled).
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        if tracer is not None:
+            with tracer.start_as_current_span(stage):
+                yield
+        else:
+            yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def record_token_usage(model, usage):
+    """Record the `usage` block of an OpenAI response."""
+    if not METRICS_ENABLED or usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            TOKEN_USAGE.labels(model=model, kind=kind).inc(value)
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup; hit rate = hit / (hit + miss)."""
+    if not METRICS_ENABLED:
+        return
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_hedge(outcome):
+    if METRICS_ENABLED:
+        LLM_HEDGES.labels(outcome=outcome).inc()
+
+
+def record_degraded(endpoint):
+    if METRICS_ENABLED:
+        DEGRADED_RESPONSES.labels(endpoint=endpoint).inc()
+
+
+def record_coalesced(name, role):
+    if METRICS_ENABLED:
+        COALESCED_REQUESTS.labels(name=name, role=role).inc()
+
+
+@contextmanager
+def track_pool_request():
+    """Count an OpenAI request in the in-flight gauge from start to finish."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    with OPENAI_POOL_IN_FLIGHT.track_inprogress():
+        yield
+
+
+def record_pool_request(acquire_seconds, connections, idle):
+    """Record one pooled OpenAI request and the connection states seen after it."""
+    if not METRICS_ENABLED:
+        return
+    if acquire_seconds is not None:
+        OPENAI_POOL_ACQUIRE.observe(acquire_seconds)
+    OPENAI_POOL_CONNECTIONS.labels(state="active").set(connections - idle)
+    OPENAI_POOL_CONNECTIONS.labels(state="idle").set(idle)
+
+
+def record_pool_connect():
+    if METRICS_ENABLED:
+        OPENAI_POOL_CONNECTS.inc()
+
+
+def render_metrics():
+    """Return the Prometheus exposition payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
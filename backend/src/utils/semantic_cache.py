@@ -0,0 +1,102 @@
+# backend/utils/semantic_cache.py
+import threading
+from collections import OrderedDict
+import numpy as np
+import faiss
+
+from src.utils.metrics import record_cache
+
+
+class SemanticCache:
+    """
+    Answer cache keyed by query-embedding similarity.
+
+    Entries are partitioned by (pdf_id, index_version, top_k), so a rebuilt index never
+    serves answers generated from the old one. Within a partition a query hits when its
+    cosine similarity to a cached query is at least `threshold`. The least recently used
+    entry is evicted once `max_entries` is exceeded.
+    """
+
+    def __init__(self, threshold=0.95, max_entries=1000, name="semantic_answer"):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.name = name
+        self._lock = threading.Lock()
+        self._partitions = {}  # key -> faiss.IndexIDMap2 over normalized query embeddings
+        self._entries = OrderedDict()  # entry id -> (key, entry), in LRU order
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding):
+        vec = np.asarray(embedding, dtype=np.float32).reshape(1, -1).copy()
+        faiss.normalize_L2(vec)
+        return vec
+
+    def lookup(self, embedding, pdf_id, index_version, top_k):
+        """Return the cached entry (dict) for a similar query, or None."""
+        key = (pdf_id, index_version, top_k)
+        vec = self._normalize(embedding)
+        entry = None
+
+        with self._lock:
+            index = self._partitions.get(key)
+            if index is not None and index.ntotal:
+                D, I = index.search(vec, 1)
+                if I[0][0] != -1 and D[0][0] >= self.threshold:
+                    entry_id = int(I[0][0])
+                    self._entries.move_to_end(entry_id)
+                    entry = {**self._entries[entry_id][1], "similarity": float(D[0][0])}
+
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        record_cache(self.name, entry is not None)
+        return entry
+
+    def store(self, embedding, pdf_id, index_version, top_k, query, answer, chunk_ids):
+        key = (pdf_id, index_version, top_k)
+        vec = self._normalize(embedding)
+
+        with self._lock:
+            index = self._partitions.get(key)
+            if index is None:
+                index = faiss.IndexIDMap2(faiss.IndexFlatIP(vec.shape[1]))
+                self._partitions[key] = index
+
+            entry_id = self._next_id
+            self._next_id += 1
+            index.add_with_ids(vec, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = (key, {
+                "query": query,
+                "answer": answer,
+                "chunk_ids": [int(i) for i in chunk_ids],
+            })
+
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+
+    def _evict_oldest(self):
+        entry_id, (key, _) = self._entries.popitem(last=False)
+        index = self._partitions[key]
+        index.remove_ids(np.array([entry_id], dtype=np.int64))
+        if index.ntotal == 0:
+            del self._partitions[key]
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,71 @@
+# backend/utils/single_flight.py
+import threading
+import concurrent.futures
+
+from src.utils.metrics import record_coalesced
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers arriving while it is
+    in flight (followers) wait for and share its result or exception. Nothing is kept once
+    the call finishes, so results are never served stale.
+
+    Calls may carry an `expires_at` deadline (monotonic seconds; None is unbounded). A caller
+    only joins a flight whose leader has at least as long a budget (give or take `join_slack`
+    seconds, so a burst of requests with the same timeout still coalesces), so it never inherits a
+    result degraded by someone else's shorter deadline; otherwise it starts its own flight, which
+    later callers for the key join instead.
+    """
+
+    def __init__(self, name, join_slack=0.0):
+        self.name = name
+        self.join_slack = join_slack
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> (Future, expires_at) of the joinable in-flight call
+
+    def do(self, key, fn, *args, timeout=None, expires_at=None):
+        """
+        Run `fn(*args)` or join an identical in-flight call. `timeout` bounds how long a follower
+        waits (concurrent.futures.TimeoutError); giving up never affects the leader or other followers.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None or not self._outlasts(call[1], expires_at)
+            if leader:
+                call = (concurrent.futures.Future(), expires_at)
+                self._calls[key] = call
+        future = call[0]
+
+        record_coalesced(self.name, "leader" if leader else "follower")
+        if not leader:
+            return future.result(timeout)
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            # Followers see the same failure, including cancellation of the leader
+            self._finish(key, call)
+            future.set_exception(e)
+            raise
+        self._finish(key, call)
+        future.set_result(result)
+        return result
+
+    def _outlasts(self, leader_expires_at, expires_at):
+        if leader_expires_at is None:
+            return True
+        return expires_at is not None and leader_expires_at + self.join_slack >= expires_at
+
+    def _finish(self, key, call):
+        # Unregister before publishing so later arrivals start a fresh call; a newer flight
+        # registered under the same key stays joinable
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,136 @@
+# backend/utils/thumbnails.py
+import os
+import time
+import logging
+import tempfile
+import threading
+from pdf2image import convert_from_path
+
+from src.config.settings import (
+    THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_MB, THUMBNAIL_WIDTH, THUMBNAIL_QUALITY
+)
+from src.utils.metrics import span, record_cache
+from src.utils.single_flight import SingleFlight
+
+
+def pdf_version(pdf_path, stat_result=None):
+    """Identity of a PDF's current contents; changes whenever the file is modified or replaced."""
+    st = stat_result or os.stat(pdf_path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+class ThumbnailCache:
+    """
+    Disk cache of WebP page thumbnails.
+
+    Files live under `<cache_dir>/<pdf name>-<pdf version>/<page>-<width>.webp`, so a replaced PDF
+    or a new width never serves old images; orphaned files simply age out. Every read bumps the
+    file's access time, and once the cache grows past `max_mb` the least recently used files are
+    deleted until it is back under 90% of the budget.
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, max_mb=THUMBNAIL_CACHE_MAX_MB,
+                 width=THUMBNAIL_WIDTH, quality=THUMBNAIL_QUALITY):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.width = width
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk, scanned on the first write
+        self._renders = SingleFlight("thumbnail")
+
+    def path(self, pdf_path, page):
+        name = os.path.splitext(os.path.basename(pdf_path))[0]
+        return os.path.join(self.cache_dir, f"{name}-{pdf_version(pdf_path)}", f"{page}-{self.width}.webp")
+
+    def get(self, pdf_path, page):
+        """Path of the page's thumbnail (1-based), rendered on a miss; None if the page does not exist."""
+        path = self.path(pdf_path, page)
+        hit = self._touch(path)
+        record_cache("thumbnail", hit)
+        if hit:
+            return path
+        # Concurrent misses for the same page render it once
+        return self._renders.do(path, self._render, pdf_path, page, path)
+
+    def store_pages(self, pdf_path, images):
+        """Save thumbnails of already rasterized pages (images[0] is page 1)."""
+        with span("thumbnails"):
+            for page, image in enumerate(images, start=1):
+                self._save(image, self.path(pdf_path, page))
+
+    def _render(self, pdf_path, page, path):
+        with span("thumbnail_render"):
+            images = convert_from_path(pdf_path, first_page=page, last_page=page, size=(self.width, None))
+        if not images:
+            return None
+        self._save(images[0], path)
+        return path
+
+    def _save(self, image, path):
+        thumb = image.convert("RGB")
+        thumb.thumbnail((self.width, self.width * 4))
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+
+        # Write then rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                thumb.save(f, "WEBP", quality=self.quality, method=4)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(st.st_size for _, st in self._files())
+            else:
+                self._size += os.path.getsize(path) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    @staticmethod
+    def _touch(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        # Access time is the LRU clock; set it explicitly since mounts often use noatime/relatime
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        return True
+
+    def _files(self):
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(".webp"):
+                    path = os.path.join(root, name)
+                    try:
+                        yield path, os.stat(path)
+                    except FileNotFoundError:
+                        continue
+
+    def _evict(self):
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for path, st in sorted(self._files(), key=lambda item: item[1].st_atime_ns):
+            if self._size <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            self._size -= st.st_size
+            evicted += 1
+            try:
+                os.rmdir(os.path.dirname(path))  # only succeeds once the document's folder is empty
+            except OSError:
+                pass
+        logging.info(f"Evicted {evicted} thumbnails; cache now {self._size / (1024 * 1024):.1f} MB")
+
+
+# Shared by ingestion (pre-rendering) and the PDF routes (serving)
+thumbnail_cache = ThumbnailCache()
@@ -3,9 +3,15 @@ import base64
 import io
 import json
 import csv
+import uuid
+import tempfile
 import logging
 import pytesseract
 import re
+import threading
+import time
+import importlib.util
+import httpx
 import pandas as pd
 import numpy as np
 from pdf2image import convert_from_path
@@ -17,15 +23,36 @@ import concurrent.futures
 from tqdm import tqdm
 
 # Load configurations
-from src.config.settings import OPENAI_API_KEY, OUTPUT_PATH
+from src.config.settings import (
+    OPENAI_API_KEY, OPENAI_BASE_URL, OUTPUT_PATH, OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE,
+    OPENAI_KEEPALIVE_EXPIRY, OPENAI_HTTP2, OPENAI_TIMEOUT, OPENAI_CONNECT_TIMEOUT, OPENAI_MAX_RETRIES,
+    SUMMARY_GROUP_CHARS, SUMMARY_WORKERS
+)
+from src.utils.metrics import (
+    span, record_token_usage, track_pool_request, record_pool_request, record_pool_connect
+)
+from src.utils.embeddings import get_embedding_backend
+from src.utils.hedging import Hedger
+from src.utils.thumbnails import thumbnail_cache
 
-# Initialize OpenAI Client
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+# Process umask (can only be read by setting it); mkstemp files are 0600 regardless of it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 def save_json(filepath, data):
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=4)
+    # Write then rename, so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+        # Same permissions as a file created with open()
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 
 def load_json(filepath):
@@ -66,30 +93,194 @@ class PDFProcessor:
 # ----------------------------------------------------------
 # 2. OpenAI Client (Embeddings & Chat)
 # ----------------------------------------------------------
+class PoolTransport(httpx.HTTPTransport):
+    """HTTP transport that tracks connection-pool utilization and acquire time."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.connections_opened = 0
+        self.acquire_seconds_total = 0.0
+
+    def handle_request(self, request):
+        start = time.perf_counter()
+        acquired = []
+        parent_trace = request.extensions.get("trace")
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.connections_opened += 1
+                record_pool_connect()
+            elif event_name.endswith("send_request_headers.started") and not acquired:
+                acquired.append(time.perf_counter() - start)
+            if parent_trace is not None:
+                parent_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        with self._lock:
+            self.in_flight += 1
+        try:
+            with track_pool_request():
+                return super().handle_request(request)
+        finally:
+            acquire = acquired[0] if acquired else None
+            with self._lock:
+                self.in_flight -= 1
+                self.requests += 1
+                self.acquire_seconds_total += acquire or 0.0
+            connections, idle = self._connection_counts()
+            record_pool_request(acquire, connections, idle)
+
+    def _connection_counts(self):
+        connections = list(self._pool.connections)
+        return len(connections), sum(1 for c in connections if c.is_idle())
+
+    def stats(self):
+        connections, idle = self._connection_counts()
+        with self._lock:
+            return {
+                "max_connections": OPENAI_MAX_CONNECTIONS,
+                "connections": connections,
+                "idle_connections": idle,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "mean_acquire_ms": round(1000 * self.acquire_seconds_total / self.requests, 3) if self.requests else 0.0,
+            }
+
+
+_shared_client = None
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_openai_client():
+    """Return the process-wide OpenAI client, creating it (and its connection pool) on first use."""
+    global _shared_client, _shared_transport
+    with _shared_lock:
+        if _shared_client is None:
+            http2 = OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+            if OPENAI_HTTP2 and not http2:
+                logging.warning("OPENAI_HTTP2 is enabled but the 'h2' package is missing; using HTTP/1.1.")
+
+            _shared_transport = PoolTransport(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+                ),
+            )
+            _shared_client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                max_retries=OPENAI_MAX_RETRIES,
+                http_client=httpx.Client(
+                    transport=_shared_transport,
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+                ),
+            )
+        return _shared_client
+
+
+def close_openai_client():
+    """Close the shared client's connection pool (called on application shutdown)."""
+    global _shared_client, _shared_transport
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = None
+        _shared_transport = None
+
+
+def get_pool_stats():
+    """Snapshot of the shared connection pool, or an empty dict before first use."""
+    transport = _shared_transport
+    return transport.stats() if transport is not None else {}
+
+
 class OpenAIClient:
     """Manages communication with OpenAI API for embeddings and chat completions."""
 
-    def __init__(self, client):
-        self.client = client
+    def __init__(self, client=None, embedding_backend=None):
+        self.client = client or get_openai_client()
+        # Embeddings go through a pluggable backend (OpenAI or local CPU model)
+        self.embedding_backend = embedding_backend or get_embedding_backend(self.client)
+        self.hedger = Hedger()
 
-    def get_embeddings(self, text):
-        response = client.embeddings.create(
-            model="text-embedding-3-large",
-            input=text  # OpenAI expects a list of strings
-        )
-        return np.array(response.data[0].embedding, dtype=np.float32)  # Convert directly to np.array
-
-    def chat_completion(self, system_prompt, user_content, max_tokens=300):
-        """Generate chat completion using OpenAI."""
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-            max_tokens=max_tokens,
-            temperature=0.5,
+    @staticmethod
+    def _request_options(timeout):
+        # Only override the client-wide timeout when a per-call value is given
+        return {"timeout": timeout} if timeout is not None else {}
+
+    def get_embeddings(self, text, timeout=None):
+        with span("embedding"):
+            return self.embedding_backend.embed([text], timeout)[0]
+
+    def get_embeddings_batch(self, texts, timeout=None):
+        """Embed many texts with as few backend calls as possible."""
+        with span("embedding_batch"):
+            return self.embedding_backend.embed(list(texts), timeout)
+
+    def chat_completion(self, system_prompt, user_content, max_tokens=300, timeout=None, deadline=None):
+        """
+        Generate chat completion using OpenAI.
+        With a deadline, the call is hedged and raises DeadlineExceeded if the deadline passes.
+        """
+        if deadline is None:
+            return self._chat_completion_once(self.client, system_prompt, user_content, max_tokens, timeout)
+
+        # The hedger retries within the deadline; SDK retries would run past it
+        client = self.client.with_options(max_retries=0)
+        return self.hedger.call(
+            f"chat_{max_tokens}",
+            lambda remaining: self._chat_completion_once(client, system_prompt, user_content, max_tokens, remaining),
+            deadline,
         )
+
+    def _chat_completion_once(self, client, system_prompt, user_content, max_tokens, timeout):
+        with span("chat_completion"):
+            response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content},
+                ],
+                max_tokens=max_tokens,
+                temperature=0.5,
+                **self._request_options(timeout)
+            )
+        record_token_usage("gpt-4o-mini", getattr(response, "usage", None))
+        return response.choices[0].message.content
+
+    def vision_completion(self, system_prompt, data_uri, max_tokens=500, timeout=None):
+        """Describe an image (passed as a data URI) using OpenAI."""
+        with span("vision_page"):
+            response = self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"{data_uri}"
+                                }
+                            }
+                        ]
+                    },
+                ],
+                max_tokens=max_tokens,
+                temperature=0,
+                top_p=0.1,
+                **self._request_options(timeout)
+            )
+        record_token_usage("gpt-4o-mini", getattr(response, "usage", None))
         return response.choices[0].message.content
 
 
@@ -157,12 +348,59 @@ class ContentChunker:
 # ----------------------------------------------------------
 # 4. Summarizer (Summarize Content)
 # ----------------------------------------------------------
+SUMMARY_ERROR = "⚠Error generating summary."
+
+
 class Summarizer:
     """Summarizes document content."""
 
     def __init__(self, openai_client):
         self.openai_client = openai_client
 
+    def summarize_pages(self, pages, max_tokens=700, group_chars=SUMMARY_GROUP_CHARS):
+        """
+        Map-reduce summary: pack pages into groups of about `group_chars`, summarize the groups in
+        parallel, then merge the partial summaries (repeating until they fit in one prompt).
+        """
+        pages = [p for p in pages if p and p.strip()]
+        try:
+            while len(pages) > 1 and sum(len(p) for p in pages) > group_chars:
+                groups = self._group_pages(pages, group_chars)
+                with span("summarize_map"), \
+                        concurrent.futures.ThreadPoolExecutor(max_workers=SUMMARY_WORKERS) as executor:
+                    summaries = list(executor.map(self._summarize_group, groups))
+                # One page per group (group_chars below a group summary's size) cannot converge
+                converged = len(summaries) < len(pages)
+                pages = summaries
+                if not converged:
+                    break
+        except Exception as e:
+            logging.error(f"Summarization failed: {e}")
+            return SUMMARY_ERROR
+
+        with span("summarize_reduce"):
+            return self.summarize("\n\n".join(pages), max_tokens)
+
+    @staticmethod
+    def _group_pages(pages, group_chars):
+        groups, current, size = [], [], 0
+        for page in pages:
+            if current and size + len(page) > group_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(page[:group_chars])
+            size += len(current[-1])
+        if current:
+            groups.append(current)
+        return groups
+
+    def _summarize_group(self, group):
+        prompt = '''You will be given a consecutive section of a business or financial document. Write dense notes
+                  covering every key fact, figure, policy, proposal and decision in it, preserving numbers exactly.
+                  These notes will be merged with notes from other sections, so do not add introductions or
+                  conclusions. Use plain text bullet points without markdown symbols.'''
+        return self.openai_client.chat_completion(prompt, "\n\n".join(group), max_tokens=400).strip()
+
     def summarize(self, text, max_tokens=700):
         """Generate summary from content."""
         try:
@@ -189,7 +427,7 @@ class Summarizer:
 
         except Exception as e:
             logging.error(f"Summarization failed: {e}")
-            return "⚠Error generating summary."
+            return SUMMARY_ERROR
 
 
 # ----------------------------------------------------------
@@ -198,10 +436,14 @@ class Summarizer:
 class FAISSManager:
     """Manages FAISS index for storing and searching embeddings."""
 
-    def __init__(self, faiss_paths, pdf_id):
+    # Indices written before embedding metadata was recorded were all built with this
+    LEGACY_EMBEDDING_META = {"backend": "openai", "model": "text-embedding-3-large"}
+
+    def __init__(self, faiss_paths, pdf_id, openai_client=None):
         self.faiss_paths = faiss_paths
         self.pdf_id = pdf_id
-        self.openai_client = OpenAIClient(client)
+        self.openai_client = openai_client or OpenAIClient()
+        self.embedding_meta = None
 
     def save_faiss_index(self, clean_content):
         """Save FAISS index and metadata to disk."""
@@ -217,18 +459,27 @@ class FAISSManager:
                 df['page'] = [c.get("page", "Unknown") for c in clean_content]
 
             # Generate embeddings
-            df['embeddings'] = df['content'].apply(lambda x: self.openai_client.get_embeddings(x))
+            with span("ingest_embed"):
+                embeddings = self.openai_client.get_embeddings_batch(df['content'].tolist())
+            df['embeddings'] = list(embeddings)
 
             # Save metadata with page numbers
             df.to_csv(self.faiss_paths[self.pdf_id]["metadata"], index=False, quoting=csv.QUOTE_NONNUMERIC)
 
-            embeddings = np.vstack(df["embeddings"].tolist()).astype(np.float32)
+            embeddings = embeddings.astype(np.float32)
             d = embeddings.shape[1]
 
             # Save FAISS index
-            index = faiss.IndexFlatIP(d)
-            index.add(embeddings)
-            faiss.write_index(index, self.faiss_paths[self.pdf_id]["index"])
+            with span("ingest_index"):
+                index = faiss.IndexFlatIP(d)
+                index.add(embeddings)
+                faiss.write_index(index, self.faiss_paths[self.pdf_id]["index"])
+
+            # Record which embedding backend/model built the index, and a build id that survives copies
+            self.embedding_meta = {**self.openai_client.embedding_backend.describe(), "dim": d,
+                                   "build_id": uuid.uuid4().hex}
+            if "embedding_meta" in self.faiss_paths[self.pdf_id]:
+                save_json(self.faiss_paths[self.pdf_id]["embedding_meta"], self.embedding_meta)
 
             logging.info(
                 f"FAISS index and metadata saved: {self.faiss_paths[self.pdf_id]['index']}, {self.faiss_paths[self.pdf_id]['metadata']}")
@@ -241,39 +492,120 @@ class FAISSManager:
         try:
             index = faiss.read_index(self.faiss_paths[self.pdf_id]['index'])
             df_metadata = pd.read_csv(self.faiss_paths[self.pdf_id]['metadata'])
+            meta_path = self.faiss_paths[self.pdf_id].get('embedding_meta')
+            self.embedding_meta = load_json(meta_path) if meta_path else {}
+            self.embedding_meta = self.embedding_meta or {**self.LEGACY_EMBEDDING_META, "dim": index.d}
+
+            if not self.embedding_compatible():
+                logging.warning(
+                    f"FAISS index for {self.pdf_id} was built with {self._describe_meta(self.embedding_meta)}, "
+                    f"but queries use {self._describe_meta(self.openai_client.embedding_backend.describe())}; "
+                    f"searches will be rejected until the index is rebuilt.")
             return index, df_metadata
 
         except Exception as e:
             logging.error(f"Error loading FAISS index: {e}")
             raise HTTPException(status_code=500, detail="Failed to load FAISS index")
 
+    def index_version(self):
+        """
+        Identifies the index build; changes whenever the index is rebuilt, but not when the files
+        are copied, restored or touched. Indices without a build id are identified by their size.
+        """
+        build_id = (self.embedding_meta or {}).get("build_id")
+        if build_id:
+            return build_id
+        return f"legacy-{os.path.getsize(self.faiss_paths[self.pdf_id]['index']):x}"
+
+    @staticmethod
+    def _describe_meta(meta):
+        return f"{meta.get('backend')}/{meta.get('model')}"
+
+    def embedding_compatible(self):
+        """True if queries embedded by the current backend live in the same space as the index."""
+        if self.embedding_meta is None:
+            return True
+        current = self.openai_client.embedding_backend.describe()
+        return (current["backend"], current["model"]) == (self.embedding_meta.get("backend"),
+                                                           self.embedding_meta.get("model"))
+
+    def _check_embedding_compatible(self):
+        if not self.embedding_compatible():
+            raise HTTPException(
+                status_code=409,
+                detail=f"Index for {self.pdf_id} was built with {self._describe_meta(self.embedding_meta)}; "
+                       f"current embedding backend is "
+                       f"{self._describe_meta(self.openai_client.embedding_backend.describe())}. Rebuild the index.")
+
+    def embed_query(self, query, timeout=None):
+        self._check_embedding_compatible()
+        with span("embed_query"):
+            return np.array(self.openai_client.get_embeddings(query, timeout), dtype=np.float32).reshape(1, -1)
+
+    def embed_queries(self, queries):
+        self._check_embedding_compatible()
+        with span("embed_query_batch"):
+            return self.openai_client.get_embeddings_batch(list(queries))
+
     def search_faiss(self, query, faiss_indices, top_k=6):
         if self.pdf_id not in faiss_indices:
             raise HTTPException(status_code=400, detail="Invalid PDF ID")
 
+        return self.search_by_embedding(self.embed_query(query), faiss_indices, top_k)
+
+    def search_by_embedding(self, query_embedding, faiss_indices, top_k=6):
+        if self.pdf_id not in faiss_indices:
+            raise HTTPException(status_code=400, detail="Invalid PDF ID")
+
         index, df_metadata = faiss_indices[self.pdf_id]
-        query_embedding = np.array(self.openai_client.get_embeddings(query), dtype=np.float32).reshape(1, -1)
-        D, I = index.search(query_embedding, k=top_k)
+        with span("faiss_search"):
+            D, I = index.search(query_embedding, k=top_k)
 
         if np.all(I == -1):
             return []
 
+        return self._materialize(df_metadata, I[0], D[0])
+
+    def search_batch(self, query_embeddings, faiss_indices, top_k=6):
+        """Search several query embeddings with a single index.search call."""
+        if self.pdf_id not in faiss_indices:
+            raise HTTPException(status_code=400, detail="Invalid PDF ID")
+
+        index, df_metadata = faiss_indices[self.pdf_id]
+        with span("faiss_search_batch"):
+            D, I = index.search(query_embeddings, k=top_k)
+
+        return [
+            [] if np.all(I[row] == -1) else self._materialize(df_metadata, I[row], D[row])
+            for row in range(len(query_embeddings))
+        ]
+
+    def fetch_chunks(self, query_embedding, chunk_ids, faiss_indices):
+        """Materialize known chunk ids, scored against a (new) query embedding."""
+        index, df_metadata = faiss_indices[self.pdf_id]
+        vectors = np.vstack([index.reconstruct(int(idx)) for idx in chunk_ids])
+        scores = vectors @ query_embedding.reshape(-1)
+        return self._materialize(df_metadata, chunk_ids, scores)
+
+    @staticmethod
+    def _materialize(df_metadata, ids, scores):
         results = []
-        for rank, idx in enumerate(I[0]):
-            if idx == -1:
-                continue
+        with span("materialize"):
+            for rank, idx in enumerate(ids):
+                if idx == -1:
+                    continue
 
-            record = df_metadata.iloc[idx].to_dict()
+                record = df_metadata.iloc[idx].to_dict()
 
-            # Add explicit index and ensure page reference
-            record["index"] = int(idx)
-            record["similarity_score"] = float(D[0][rank])
-            record["summary"] = record.get("summary", "No summary available.")
+                # Add explicit index and ensure page reference
+                record["index"] = int(idx)
+                record["similarity_score"] = float(scores[rank])
+                record["summary"] = record.get("summary", "No summary available.")
 
-            # Ensure page number is passed correctly
-            record["page"] = record["page"] if "page" in record and pd.notna(record["page"]) else "Unknown"
+                # Ensure page number is passed correctly
+                record["page"] = record["page"] if "page" in record and pd.notna(record["page"]) else "Unknown"
 
-            results.append(record)
+                results.append(record)
 
         return results
 
@@ -284,11 +616,11 @@ class FAISSManager:
 class DocumentProcessor:
     """Combines all utilities to process a document."""
 
-    def __init__(self, pdf_id, pdf_path, faiss_paths):
+    def __init__(self, pdf_id, pdf_path, faiss_paths, openai_client=None):
         self.pdf_id = pdf_id
         self.pdf_path = pdf_path
         self.pdf_processor = PDFProcessor(pdf_path)
-        self.openai_client = OpenAIClient(client)
+        self.openai_client = openai_client or OpenAIClient()
         self.summarizer = Summarizer(self.openai_client)
         self.faiss_paths = faiss_paths
 
@@ -298,15 +630,22 @@ class DocumentProcessor:
         doc = {
             "filename": filename
         }
-        text = self.pdf_processor.extract_text_from_doc()
+        with span("ingest_extract_text"):
+            text = self.pdf_processor.extract_text_from_doc()
         doc['text'] = text
-        imgs = self.pdf_processor.convert_to_images()
+        with span("ingest_rasterize"):
+            imgs = self.pdf_processor.convert_to_images()
+        try:
+            # Pre-render page previews while the pages are already rasterized
+            thumbnail_cache.store_pages(self.pdf_path, imgs)
+        except Exception as e:
+            logging.warning(f"Could not save page thumbnails for {filename}: {e}")
         pages_description = []
 
         print(f"Analyzing pages for doc {filename}")
 
         # Concurrent execution
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        with span("ingest_vision"), concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
 
             # Removing 1st slide as it's usually just an intro
             futures = [
@@ -324,24 +663,7 @@ class DocumentProcessor:
 
         doc['pages_description'] = pages_description
 
-        # Generate document summary
-        full_text = " ".join(pages_description)
-        # Generate summary only if it hasn't been saved before
-        summaries = {}
-        if os.path.exists(self.faiss_paths[self.pdf_id]["summary"]):
-            with open(self.faiss_paths[self.pdf_id]["summary"], "r") as f:
-                summaries = json.load(f)
-
-        if filename not in summaries or not summaries[filename]:
-            doc['summary'] = self.summarizer.summarize(text, max_tokens=700)  # Generate summary once
-            summaries[filename] = doc['summary']
-
-            # Save to JSON file
-            with open(self.faiss_paths[self.pdf_id]["summary"], "w") as f:
-                json.dump(summaries, f, indent=4)
-        else:
-            doc['summary'] = summaries[filename]  # Load existing summary
-
+        # Summaries are generated from the indexed chunks by RAGService's background jobs
         return doc
 
     def analyze_image(self, data_uri):
@@ -387,27 +709,7 @@ class DocumentProcessor:
             Financial/Business Implications: (If applicable, highlight major business or investment impacts)
             '''
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt_1},
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"{data_uri}"
-                            }
-                        }
-                    ]
-                },
-            ],
-            max_tokens=500,
-            temperature=0,
-            top_p=0.1
-        )
-        return response.choices[0].message.content
+        return self.openai_client.vision_completion(system_prompt_1, data_uri, max_tokens=500)
 
     def analyze_doc_image(self, img):
         img_uri = self.get_img_uri(img)
@@ -425,7 +727,7 @@ class DocumentProcessor:
     # ----------------------------------------------------------
     # Generate Output Method (with pdf_id filter)
     # ----------------------------------------------------------
-    def generate_output(self, query, similar_content):
+    def generate_output(self, query, similar_content, deadline=None):
 
         system_prompt = '''
             You will be provided with an input prompt and content as context that can be used to reply to the prompt.
@@ -454,16 +756,16 @@ class DocumentProcessor:
         content = "\n".join(formatted_chunks)
         prompt = f"INPUT PROMPT:\n{query}\n\n🔹 **Source Content:**\n{content}"
 
-        response = self.openai_client.chat_completion(system_prompt, prompt)
+        response = self.openai_client.chat_completion(system_prompt, prompt, deadline=deadline)
         return response
 
     # ----------------------------------------------------------
     # Compare Method (Multi-PDF Comparison with pdf_id)
     # ----------------------------------------------------------
 class Comparison():
-    def __init__(self):
-        self.openai_client = OpenAIClient(client)
-    def generate_comparison_answer(self, query, content_pdf1, content_pdf2, threshold=0.5):
+    def __init__(self, openai_client=None):
+        self.openai_client = openai_client or OpenAIClient()
+    def generate_comparison_answer(self, query, content_pdf1, content_pdf2, threshold=0.5, deadline=None):
         if not content_pdf1 and not content_pdf2:
             return "No relevant content found in either document."
 
@@ -499,10 +801,13 @@ class Comparison():
         """
 
         try:
-            response = self.openai_client.chat_completion(system_prompt, user_prompt, max_tokens=600)
+            response = self.openai_client.chat_completion(system_prompt, user_prompt, max_tokens=600,
+                                                          deadline=deadline)
             return response
 
         except Exception as e:
+            if deadline is not None:
+                raise  # the service falls back to the source chunks
             logging.error(f"OpenAI API error: {e}")
             return "Error generating comparison."
 
@@ -0,0 +1,87 @@
+# backend/tests/conftest.py
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from benchmarks.mock_openai import LatencyModel, start_mock_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_server = None
+_data_path = None
+
+
+def pytest_configure(config):
+    """
+    Point the backend at the mock OpenAI server and a scratch copy of the data before any test
+    imports `src` (settings are read at import time).
+    """
+    global _server, _data_path
+    _server, url = start_mock_server()
+    _data_path = tempfile.mkdtemp(prefix="rag-tests-")
+    shutil.copytree(os.path.join(BACKEND_DIR, "data"), _data_path, dirs_exist_ok=True)
+    os.environ.update(OPENAI_BASE_URL=url, OPENAI_API_KEY="test", DATA_PATH=_data_path)
+
+
+def pytest_unconfigure(config):
+    if _server is not None:
+        _server.shutdown()
+    if _data_path is not None:
+        shutil.rmtree(_data_path, ignore_errors=True)
+
+
+@pytest.fixture
+def mock():
+    """The mock OpenAI backend; latencies and injected failures are reset after each test."""
+    yield _server.mock
+    _server.mock.embed_latency = LatencyModel()
+    _server.mock.chat_latency = LatencyModel()
+    _server.mock.failures = {"embeddings": 0, "chat": 0}
+
+
+@pytest.fixture
+def metric():
+    """Current value of a Prometheus sample (0 if never recorded)."""
+    return lambda sample, /, **labels: REGISTRY.get_sample_value(sample, labels) or 0.0
+
+
+@pytest.fixture
+def wait_until():
+    """Poll `predicate` until it holds, failing the test after `timeout` seconds."""
+    def wait(predicate, timeout=5.0):
+        end = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > end:
+                raise AssertionError("condition not met in time")
+            time.sleep(0.01)
+    return wait
+
+
+@pytest.fixture
+def run_in_thread():
+    """Start `fn(*args)` on a thread; returns a dict filled with its 'result' or 'error' once joined."""
+    threads = []
+
+    def start(fn, *args):
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = fn(*args)
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        outcome["thread"] = thread
+        threads.append(thread)
+        return outcome
+
+    yield start
+    for thread in threads:
+        thread.join(10)
@@ -0,0 +1,88 @@
+# backend/tests/test_hedging.py
+import threading
+import concurrent.futures
+import time
+
+import pytest
+
+import src.utils.hedging as hedging
+from src.utils.hedging import Deadline, DeadlineExceeded
+from src.utils.utils import OpenAIClient
+
+
+class ScriptedLatency:
+    """Mock latency that serves the given seconds in order, then repeats the last one."""
+
+    def __init__(self, *seconds):
+        self._seconds = list(seconds)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            return self._seconds.pop(0) if len(self._seconds) > 1 else self._seconds[0]
+
+
+@pytest.fixture
+def client():
+    # A fresh client has no latency history, so hedges use HEDGE_DEFAULT_DELAY_S
+    return OpenAIClient()
+
+
+def test_hedge_fires_after_delay_and_wins(client, mock, metric, monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_DEFAULT_DELAY_S", 0.2)
+    mock.chat_latency = ScriptedLatency(3.0, 0.0)
+    calls = mock.calls["chat"]
+    fired, won = metric("rag_llm_hedges_total", outcome="fired"), metric("rag_llm_hedges_total", outcome="won")
+
+    start = time.monotonic()
+    answer = client.chat_completion("system", "hedged question", deadline=Deadline(5))
+    elapsed = time.monotonic() - start
+
+    assert answer.startswith("Answer")
+    assert 0.2 <= elapsed < 1.5
+    assert mock.calls["chat"] - calls == 2
+    assert metric("rag_llm_hedges_total", outcome="fired") == fired + 1
+    assert metric("rag_llm_hedges_total", outcome="won") == won + 1
+
+
+def test_queued_primary_is_not_hedged(client, mock, metric, monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_DEFAULT_DELAY_S", 0.1)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(hedging, "_executor", executor)
+    calls = mock.calls["chat"]
+    fired = metric("rag_llm_hedges_total", outcome="fired")
+
+    # Hold the only worker well past the hedge delay, so the primary waits in the queue
+    release = threading.Event()
+    executor.submit(release.wait)
+    threading.Timer(0.5, release.set).start()
+
+    answer = client.chat_completion("system", "queued question", deadline=Deadline(5))
+    executor.shutdown()
+
+    assert answer.startswith("Answer")
+    assert mock.calls["chat"] - calls == 1
+    assert metric("rag_llm_hedges_total", outcome="fired") == fired
+
+
+def test_retries_injected_server_error(client, mock, metric):
+    mock.failures["chat"] = 1
+    calls = mock.calls["chat"]
+    retried = metric("rag_llm_hedges_total", outcome="retried")
+
+    answer = client.chat_completion("system", "retried question", deadline=Deadline(5))
+
+    # The failed attempt was answered with a 500 (not counted as a served call), then retried
+    assert answer.startswith("Answer")
+    assert mock.failures["chat"] == 0
+    assert mock.calls["chat"] - calls == 1
+    assert metric("rag_llm_hedges_total", outcome="retried") == retried + 1
+
+
+def test_deadline_exceeded_when_upstream_is_too_slow(client, mock):
+    mock.chat_latency = ScriptedLatency(3.0)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.chat_completion("system", "slow question", deadline=Deadline(0.5))
+    assert time.monotonic() - start < 1.5
@@ -0,0 +1,77 @@
+# backend/tests/test_rag_search.py
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.mock_openai import LatencyModel
+
+
+@pytest.fixture(scope="module")
+def api():
+    from src.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+def search(api, query, deadline_ms=None):
+    body = {"query": query, "pdf_id": "pdf1"}
+    if deadline_ms is not None:
+        body["deadline_ms"] = deadline_ms
+    start = time.monotonic()
+    response = api.post("/api/rag/search/", json=body)
+    assert response.status_code == 200
+    return response.json(), time.monotonic() - start
+
+
+def test_search_answers(api, mock):
+    result, _ = search(api, "What is the dividend policy?")
+
+    assert result["answer"].startswith("Answer")
+    assert len(result["source_chunks"]) == 6
+    assert "degraded" not in result
+
+
+def test_deadline_exceeded_degrades_to_source_chunks(api, mock, metric):
+    mock.chat_latency = LatencyModel(3000)
+    degraded = metric("rag_degraded_responses_total", endpoint="search")
+
+    result, elapsed = search(api, "Who chairs the board?", deadline_ms=800)
+
+    assert result["degraded"] is True
+    assert result["answer"] is None
+    assert len(result["source_chunks"]) == 6
+    assert elapsed < 1.5
+    assert metric("rag_degraded_responses_total", endpoint="search") == degraded + 1
+
+
+def test_follower_timeout_falls_back_to_own_chunks(api, mock, metric, run_in_thread, wait_until):
+    mock.chat_latency = LatencyModel(2000)
+    calls = mock.calls["chat"]
+    followers = metric("rag_coalesced_requests_total", name="rag_search", role="follower")
+
+    leader = run_in_thread(search, api, "What are the capital expenditures?")
+    wait_until(lambda: mock.calls["chat"] > calls)
+    # Joins the leader (whose deadline is later), then stops waiting while it can still answer itself
+    result, elapsed = search(api, "What are the capital expenditures?", deadline_ms=800)
+    leader["thread"].join(10)
+
+    assert result["degraded"] is True
+    assert len(result["source_chunks"]) == 6
+    assert elapsed < 1.2
+    assert leader["result"][0]["answer"].startswith("Answer")
+    assert mock.calls["chat"] - calls == 1
+    assert metric("rag_coalesced_requests_total", name="rag_search", role="follower") == followers + 1
+
+
+def test_longer_deadline_does_not_inherit_degraded_result(api, mock, run_in_thread, wait_until):
+    mock.chat_latency = LatencyModel(1500)
+    calls = mock.calls["chat"]
+
+    leader = run_in_thread(search, api, "How much debt is outstanding?", 800)
+    wait_until(lambda: mock.calls["chat"] > calls)
+    result, _ = search(api, "How much debt is outstanding?")
+    leader["thread"].join(10)
+
+    assert leader["result"][0]["degraded"] is True
+    assert result["answer"].startswith("Answer")
@@ -0,0 +1,95 @@
+# backend/tests/test_single_flight.py
+import threading
+import concurrent.futures
+import time
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+class Blocking:
+    """A function that blocks until released, counting its executions."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_followers_share_the_leader_result(run_in_thread, wait_until):
+    flight = SingleFlight("test")
+    fn = Blocking(result=object())
+
+    leader = run_in_thread(flight.do, "key", fn)
+    wait_until(lambda: flight.in_flight() == 1)
+    followers = [run_in_thread(flight.do, "key", fn) for _ in range(3)]
+    time.sleep(0.1)
+    fn.release.set()
+    for outcome in [leader, *followers]:
+        outcome["thread"].join(5)
+
+    assert fn.calls == 1
+    assert all(outcome["result"] is fn.result for outcome in [leader, *followers])
+    assert flight.in_flight() == 0
+
+
+def test_followers_share_the_leader_exception(run_in_thread, wait_until):
+    flight = SingleFlight("test")
+    fn = Blocking(error=ValueError("upstream failed"))
+
+    leader = run_in_thread(flight.do, "key", fn)
+    wait_until(lambda: flight.in_flight() == 1)
+    follower = run_in_thread(flight.do, "key", fn)
+    time.sleep(0.1)
+    fn.release.set()
+    leader["thread"].join(5)
+    follower["thread"].join(5)
+
+    assert fn.calls == 1
+    assert leader["error"] is fn.error
+    assert follower["error"] is fn.error
+
+
+def test_follower_timeout_leaves_the_leader_running(run_in_thread, wait_until):
+    flight = SingleFlight("test")
+    fn = Blocking(result="done")
+
+    leader = run_in_thread(flight.do, "key", fn)
+    wait_until(lambda: flight.in_flight() == 1)
+    with pytest.raises(concurrent.futures.TimeoutError):
+        flight.do("key", fn, timeout=0.1)
+    fn.release.set()
+    leader["thread"].join(5)
+
+    assert leader["result"] == "done"
+
+
+def test_caller_with_a_later_deadline_starts_its_own_flight(run_in_thread, wait_until):
+    flight = SingleFlight("test")
+    short, long = Blocking(result="short"), Blocking(result="long")
+    now = time.monotonic()
+
+    leader = run_in_thread(lambda: flight.do("key", short, expires_at=now + 1))
+    wait_until(lambda: short.calls == 1)
+    own = run_in_thread(lambda: flight.do("key", long, expires_at=now + 10))
+    wait_until(lambda: long.calls == 1)
+    # Later callers join the flight with the longer budget
+    follower = run_in_thread(lambda: flight.do("key", short, expires_at=now + 5))
+    time.sleep(0.1)
+    short.release.set()
+    long.release.set()
+    for outcome in (leader, own, follower):
+        outcome["thread"].join(5)
+
+    assert (leader["result"], own["result"], follower["result"]) == ("short", "long", "long")
+    assert short.calls == 1
+    assert flight.in_flight() == 0
@@ -60,8 +60,8 @@ export default function MarketAnalyzer() {
         { query, pdf_id: selectedSearchPdf, top_k: 6 },
         { headers: { "Content-Type": "application/json" } }
       );
-      setResult(response.data.answer);
-      setSourceChunks(response.data.source_chunks);
+      setResult(response.data.answer ?? "The answer took too long to generate. The most relevant passages are shown below.");
+      setSourceChunks(withPdfId(response.data.source_chunks, selectedSearchPdf));
     } catch (error) {
       console.error("Error fetching data:", error);
       setResult("Error: Unable to fetch data. Check console for details.");
@@ -89,10 +89,10 @@ export default function MarketAnalyzer() {
         requestData,
         { headers: { "Content-Type": "application/json" } }
       );
-      setComparisonResult(response.data.response);
+      setComparisonResult(response.data.response ?? "The comparison took too long to generate. The most relevant passages are shown below.");
       setComparisonSources({
-        pdf1: response.data.source_chunks_pdf1 || [],
-        pdf2: response.data.source_chunks_pdf2 || [],
+        pdf1: withPdfId(response.data.source_chunks_pdf1 || [], requestData.pdf1_id),
+        pdf2: withPdfId(response.data.source_chunks_pdf2 || [], requestData.pdf2_id),
       });
     } catch (error) {
       console.error("Error fetching comparison data:", error);
@@ -102,6 +102,20 @@ export default function MarketAnalyzer() {
     }
   };
 
+  // Remember which PDF each source came from, for its page preview
+  const withPdfId = (chunks, pdfId) => chunks.map((chunk) => ({ ...chunk, pdfId }));
+
+  // Cached WebP thumbnail of the cited page
+  const renderPagePreview = (chunk) =>
+    chunk.Page && chunk.Page.toLowerCase() !== "unknown" && (
+      <img
+        className="page-preview"
+        src={`${BACKEND_URL}/api/pdf/${chunk.pdfId}/page/${chunk.Page}.webp`}
+        alt={`Page ${chunk.Page}`}
+        loading="lazy"
+      />
+    );
+
   // Toggle Content Expansion
   const handleChunkClick = (id) => {
     setExpandedChunk(expandedChunk === id ? null : id);
@@ -281,11 +295,14 @@ export default function MarketAnalyzer() {
                     : `Source ${index + 1}`}
 
                   {expandedChunk === index && (
-                    <Typography
-                      variant="body2"
-                    >
-                      {chunk.Content}
-                    </Typography>
+                    <>
+                      {renderPagePreview(chunk)}
+                      <Typography
+                        variant="body2"
+                      >
+                        {chunk.Content}
+                      </Typography>
+                    </>
                   )}
                 </li>
               ))}
@@ -351,9 +368,12 @@ export default function MarketAnalyzer() {
                     : `Source ${index + 1} (PDF 1)`}
 
                   {expandedChunk === `pdf1-${index}` && (
-                    <Typography variant="body2">
-                      {chunk.Content}
-                    </Typography>
+                    <>
+                      {renderPagePreview(chunk)}
+                      <Typography variant="body2">
+                        {chunk.Content}
+                      </Typography>
+                    </>
                   )}
                 </li>
               ))}
@@ -370,9 +390,12 @@ export default function MarketAnalyzer() {
                     : `Source ${index + 1} (PDF 2)`}
 
                   {expandedChunk === `pdf2-${index}` && (
-                    <Typography variant="body2">
-                      {chunk.Content}
-                    </Typography>
+                    <>
+                      {renderPagePreview(chunk)}
+                      <Typography variant="body2">
+                        {chunk.Content}
+                      </Typography>
+                    </>
                   )}
                 </li>
               ))}